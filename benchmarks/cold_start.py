@@ -0,0 +1,129 @@
+"""
+Cold-start benchmark for every page script.
+
+Each page runs in a fresh interpreter, like the first session on a newly started pod:
+Streamlit is imported, then the page script's own top-level imports are run and timed on
+their own, then the page is rendered twice with AppTest (cold, then warm). Reports both
+import times, the modules the page's imports loaded, both render times and which heavy
+libraries were loaded by the end of the cold render.
+
+    python benchmarks/cold_start.py                # anonymous visitor
+    python benchmarks/cold_start.py --logged-in    # fake session; pages call the configured backend
+    python benchmarks/cold_start.py --json results.json
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["requests", "numpy", "pandas", "pyarrow", "plotly.express", "pydantic"]
+
+
+def page_scripts() -> list[str]:
+    return [os.path.join(ROOT, "Home.py"), *sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))]
+
+
+def import_statements(script: str) -> ast.Module:
+    """The script's module-level import statements, e.g. ``from utils import api_client``."""
+    with open(script) as f:
+        tree = ast.parse(f.read(), filename=script)
+    return ast.Module(body=[node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))],
+                      type_ignores=[])
+
+
+def measure_page(script: str, logged_in: bool) -> dict:
+    """Runs in the child interpreter."""
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+
+    start = time.perf_counter()
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+    streamlit_import_time = time.perf_counter() - start
+
+    # Run the page's imports the way its first render would, so that render no longer includes them
+    code = compile(import_statements(script), script, "exec")
+    before = set(sys.modules)
+    start = time.perf_counter()
+    exec(code, {"__name__": "__page_imports__", "__file__": script})
+    import_time = time.perf_counter() - start
+    imported = len(set(sys.modules) - before)
+
+    from utils.constants import LOGGED_IN, USERNAME, USER_ID, TOKEN
+
+    app = AppTest.from_file(script, default_timeout=120)
+    if logged_in:
+        app.session_state[LOGGED_IN] = True
+        app.session_state[USERNAME] = "benchmark"
+        app.session_state[USER_ID] = "benchmark-user"
+        app.session_state[TOKEN] = "benchmark-token"
+
+    start = time.perf_counter()
+    app.run()
+    first_render = time.perf_counter() - start
+    loaded = [module for module in HEAVY_MODULES if module in sys.modules]
+
+    start = time.perf_counter()
+    app.run()
+    second_render = time.perf_counter() - start
+
+    return {
+        "page": os.path.relpath(script, ROOT),
+        "streamlit_import_s": round(streamlit_import_time, 3),
+        "import_s": round(import_time, 3),
+        "modules_imported": imported,
+        "first_render_s": round(first_render, 3),
+        "warm_render_s": round(second_render, 3),
+        "heavy_modules": loaded,
+        "exceptions": len(app.exception),
+    }
+
+
+def run_child(script: str, logged_in: bool, cache_dir: str) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--child", script]
+    if logged_in:
+        command.append("--logged-in")
+    env = {**os.environ, "NUTRIAPP_CACHE_DIR": cache_dir}
+    result = subprocess.run(command, capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_table(results: list[dict]):
+    print(f"{'page':<32} {'st import':>9} {'import':>8} {'modules':>8} {'cold':>8} {'warm':>8}  heavy modules loaded")
+    for row in results:
+        print(f"{row['page']:<32} {row['streamlit_import_s']:>8.3f}s {row['import_s']:>7.3f}s "
+              f"{row['modules_imported']:>8} {row['first_render_s']:>7.3f}s "
+              f"{row['warm_render_s']:>7.3f}s  {', '.join(row['heavy_modules']) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logged-in", action="store_true", help="render the pages with a logged-in session")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_page(args.child, args.logged_in)))
+        return
+
+    results = []
+    for script in page_scripts():
+        # A fresh cache directory per page, so no page benefits from files another one created
+        with tempfile.TemporaryDirectory() as cache_dir:
+            results.append(run_child(script, args.logged_in, cache_dir))
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
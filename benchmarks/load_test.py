@@ -0,0 +1,291 @@
+"""
+Multi-session load test for capacity planning.
+
+Each concurrency level runs in a fresh interpreter standing in for one app process. Inside it, that many
+simulated sessions run side by side on threads, as Streamlit runs them: each logs in through the sign-in
+page, then repeats dashboard -> log food -> view logs -> analysis for a number of rounds, against a local
+stub backend (benchmarks/stub_backend.py) running in its own process so its CPU isn't counted.
+
+Reports, per concurrency level: flows and page renders per second (the throughput curve), p50/p95 page
+latency, process CPU time, RSS at start and after every round, and the pickled size of each session's
+st.session_state. RSS that keeps climbing from round to round points at a per-session leak.
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --concurrency 1,4,16,32 --rounds 5 --logs 1000 --latency 50 --csv curve.csv
+"""
+import argparse
+import csv
+import gc
+import glob
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from unittest.mock import MagicMock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_backend.py")
+SIGN_IN_PAGE = "pages/7_Sign_In.py"
+FLOW = [
+    "pages/2_User_Dashboard.py",
+    "pages/4_Log_Food.py",
+    "pages/6_View_Food_Logs.py",
+    "pages/5_Nutrient_Analysis.py",
+]
+CURVE_FIELDS = ["concurrency", "sessions_ok", "flows_per_s", "renders_per_s", "p50_ms", "p95_ms", "cpu_s",
+                "cpu_util", "rss_start_mib", "rss_end_mib", "rss_per_session_mib", "rss_growth_per_round_mib",
+                "session_state_kib", "errors"]
+
+
+def current_rss() -> int:
+    """Resident set size in bytes; falls back to the peak where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def allow_concurrent_runs():
+    """
+    AppTest assumes one run at a time per process: every run installs its own mock Runtime, clears it
+    when done and patches the config for its duration, pulling the rug from under runs on other threads.
+    Give all sessions one shared Runtime and script cache instead, as a real server has, and leave the
+    config set. Every page is compiled into that cache here, on the calling thread: compiling on several
+    threads at once trips a CPython 3.11 AST bug ("AST constructor recursion depth mismatch").
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    # Each run's setup and teardown now lands on this stand-in rather than the real class
+    app_test.Runtime = type("Runtime", (), {"_instance": None})
+    script_cache = ScriptCache()
+    app_test.ScriptCache = lambda: script_cache
+    config.set_option("global.appTest", True)
+    app_test.patch_config_options = lambda overrides: nullcontext()
+    for script in [os.path.join(ROOT, "Home.py"), *sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))]:
+        script_cache.get_bytecode(script)
+
+
+def session_state_size(app) -> int:
+    size = 0
+    for value in app.session_state.filtered_state.values():
+        try:
+            size += len(pickle.dumps(value))
+        except Exception:
+            size += sys.getsizeof(value)
+    return size
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+class Session:
+    """
+    One simulated user: an AppTest instance keeps its session state across page switches
+    """
+
+    def __init__(self, username: str):
+        from streamlit.testing.v1 import AppTest
+
+        self.username = username
+        self.app = AppTest.from_file(os.path.join(ROOT, "Home.py"), default_timeout=600)
+        self.latencies: list[tuple[str, float]] = []
+        self.errors: list[str] = []
+
+    def _render(self, page: str, interact=None):
+        start = time.perf_counter()
+        self.app.switch_page(page).run()
+        if interact is not None:
+            interact(self.app)
+        self.latencies.append((page, time.perf_counter() - start))
+        self.errors.extend(f"{page}: {exception.value}" for exception in self.app.exception)
+        self.errors.extend(f"{page}: {error.value}" for error in self.app.error)
+
+    def log_in(self):
+        def submit(app):
+            app.text_input[0].input(self.username)
+            app.text_input[1].input("load-test")
+            app.button[0].click().run()
+        self._render(SIGN_IN_PAGE, submit)
+
+    def log_food(self, app):
+        from utils.constants import FOOD_INPUT, NUTRIENT_INPUT_PREFIX
+
+        app.text_input(key=FOOD_INPUT).input("Apple")
+        app.number_input(key=f"{NUTRIENT_INPUT_PREFIX}calories").set_value(95.0)
+        app.number_input(key=f"{NUTRIENT_INPUT_PREFIX}carbs").set_value(25.0)
+        next(button for button in app.button if button.label == "💾 Save").click().run()
+
+    def flow(self):
+        for page in FLOW:
+            self._render(page, self.log_food if page == "pages/4_Log_Food.py" else None)
+
+
+def measure_level(concurrency: int, rounds: int) -> dict:
+    """Runs in the child interpreter: `concurrency` sessions, `rounds` flows each."""
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest  # noqa: F401
+
+    allow_concurrent_runs()
+    gc.collect()
+    rss_start = current_rss()
+    rss_rounds = []
+
+    def sample_rss():
+        gc.collect()
+        rss_rounds.append(current_rss())
+
+    # Everyone finishes a round before the next starts, so RSS is sampled at comparable points
+    barrier = threading.Barrier(concurrency, action=sample_rss)
+    sessions = [Session(f"load-{concurrency}-{i}@example.com") for i in range(concurrency)]
+    failed = []
+
+    def run_session(session: Session):
+        try:
+            session.log_in()
+            for _ in range(rounds):
+                session.flow()
+                barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        except Exception as e:
+            failed.append(f"{session.username}: {e!r}")
+            barrier.abort()
+
+    threads = [threading.Thread(target=run_session, args=(session,), name=session.username) for session in sessions]
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    latencies = sorted(seconds for session in sessions for _, seconds in session.latencies)
+    by_page = {}
+    for session in sessions:
+        for page, seconds in session.latencies:
+            by_page.setdefault(page, []).append(seconds)
+    rss_end = rss_rounds[-1] if rss_rounds else current_rss()
+    state_sizes = [session_state_size(session.app) for session in sessions]
+    errors = [error for session in sessions for error in session.errors] + failed
+
+    return {
+        "concurrency": concurrency,
+        "sessions_ok": concurrency - len(failed),
+        "wall_s": round(wall, 3),
+        "flows_per_s": round(len(rss_rounds) * concurrency / wall, 3),
+        "renders_per_s": round(len(latencies) / wall, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "pages": {page: {"p50_ms": round(percentile(sorted(values), 0.50) * 1000, 1),
+                         "p95_ms": round(percentile(sorted(values), 0.95) * 1000, 1)}
+                  for page, values in by_page.items()},
+        "cpu_s": round(cpu, 3),
+        "cpu_util": round(cpu / wall, 3),
+        "rss_start_mib": round(rss_start / 2 ** 20, 1),
+        "rss_end_mib": round(rss_end / 2 ** 20, 1),
+        "rss_rounds_mib": [round(rss / 2 ** 20, 1) for rss in rss_rounds],
+        # Includes the one-off cost of the app's imports; the marginal cost shows across levels
+        "rss_per_session_mib": round((rss_end - rss_start) / concurrency / 2 ** 20, 2),
+        # The first round pays for imports and caches; later growth is what a leak looks like
+        "rss_growth_per_round_mib": round((rss_rounds[-1] - rss_rounds[0]) / (len(rss_rounds) - 1) / 2 ** 20, 2)
+        if len(rss_rounds) > 1 else None,
+        "session_state_kib": round(sum(state_sizes) / len(state_sizes) / 1024, 1),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+    }
+
+
+def start_stub(logs: int, latency_ms: float, jitter_ms: float) -> tuple[subprocess.Popen, str]:
+    command = [sys.executable, "-u", STUB, "--port", "0", "--logs", str(logs),
+               "--latency", str(latency_ms), "--jitter", str(jitter_ms)]
+    stub = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    # First line: "Stub backend on <url> (...)"
+    url = stub.stdout.readline().split()[3]
+    return stub, url
+
+
+def run_child(concurrency: int, rounds: int, backend_url: str) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--child", str(concurrency), "--rounds", str(rounds)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {**os.environ, "NUTRIAPP_CACHE_DIR": cache_dir, "NUTRIAPP_BACKEND_URL": backend_url}
+        result = subprocess.run(command, capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_curve(results: list[dict]):
+    peak = max(row["renders_per_s"] for row in results) or 1
+    print(f"{'sessions':>8} {'flows/s':>8} {'renders/s':>10} {'p50':>8} {'p95':>8} {'cpu':>6} "
+          f"{'rss start':>10} {'rss end':>9} {'per sess':>9} {'leak/rnd':>9} {'state':>8}  throughput")
+    for row in results:
+        leak = row["rss_growth_per_round_mib"]
+        print(f"{row['concurrency']:>8} {row['flows_per_s']:>8.2f} {row['renders_per_s']:>10.2f} "
+              f"{row['p50_ms']:>6.0f}ms {row['p95_ms']:>6.0f}ms {row['cpu_util']:>6.0%} "
+              f"{row['rss_start_mib']:>7.1f}MiB {row['rss_end_mib']:>6.1f}MiB {row['rss_per_session_mib']:>6.2f}MiB "
+              f"{'-' if leak is None else f'{leak:.2f}MiB':>9} {row['session_state_kib']:>5.1f}KiB  "
+              f"{'#' * round(30 * row['renders_per_s'] / peak)}"
+              + (f"  ({row['errors']} errors, {row['concurrency'] - row['sessions_ok']} sessions failed)"
+                 if row["errors"] or row["sessions_ok"] < row["concurrency"] else ""))
+    for row in results:
+        for error in row["error_samples"]:
+            print(f"  [{row['concurrency']}] {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="comma-separated concurrent sessions")
+    parser.add_argument("--rounds", type=int, default=3, help="flows per session after logging in")
+    parser.add_argument("--logs", type=int, default=500, help="synthetic food logs per user in the stub")
+    parser.add_argument("--latency", type=float, default=20.0, help="stub latency per request, ms")
+    parser.add_argument("--jitter", type=float, default=5.0, help="random +/- stub latency, ms")
+    parser.add_argument("--json", help="also write the full results to this file")
+    parser.add_argument("--csv", help="also write the throughput curve to this file")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure_level(args.child, args.rounds)))
+        return
+
+    stub, backend_url = start_stub(args.logs, args.latency, args.jitter)
+    try:
+        results = [run_child(int(level), args.rounds, backend_url) for level in args.concurrency.split(",")]
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print_curve(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CURVE_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+End-to-end page benchmark against the local stub backend.
+
+For every data size, a fresh interpreter starts a stub backend with that many food logs per user,
+logs in and renders each logged-in page with AppTest, in the order a user would visit them.
+Each page is rendered twice (cold, then warm). Reports wall time, peak traced memory
+and the number of backend requests per render.
+
+    python benchmarks/page_bench.py
+    python benchmarks/page_bench.py --sizes 10,1000,100000 --latency 50 --json results.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = [
+    "pages/2_User_Dashboard.py",
+    "pages/5_Nutrient_Analysis.py",
+    "pages/6_View_Food_Logs.py",
+    "pages/4_Log_Food.py",
+    "pages/3_User_Profile.py",
+]
+RENDERS = ("cold", "warm")
+
+
+def log_in(app, session: dict):
+    from utils.constants import LOGGED_IN, USERNAME, USER_ID, TOKEN
+
+    app.session_state[LOGGED_IN] = True
+    app.session_state[USERNAME] = session["username"]
+    app.session_state[USER_ID] = session["user_id"]
+    app.session_state[TOKEN] = session["token"]
+
+
+def measure_size(logs: int, latency_ms: float, trace_memory: bool) -> list[dict]:
+    """Runs in the child interpreter: one stub, every page, cold and warm."""
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(ROOT)
+
+    from stub_backend import StubBackend
+
+    stub = StubBackend(logs=logs, latency_ms=latency_ms).start()
+    # Must be set before the app's modules are imported; constants read it once
+    os.environ["NUTRIAPP_BACKEND_URL"] = stub.url
+
+    from streamlit.testing.v1 import AppTest
+
+    session = stub.login("benchmark@example.com")
+    results = []
+    for page in PAGES:
+        app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+        log_in(app, session)
+        for render in RENDERS:
+            requests_before = stub.request_count()
+            if trace_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            app.run()
+            wall = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+
+            results.append({
+                "logs": logs,
+                "page": page,
+                "render": render,
+                "wall_s": round(wall, 3),
+                "peak_mib": round(peak / 2 ** 20, 2) if peak is not None else None,
+                "requests": stub.request_count() - requests_before,
+                "exceptions": len(app.exception),
+                "errors": [error.value for error in app.error],
+            })
+    stub.stop()
+    return results
+
+
+def run_child(logs: int, latency_ms: float, trace_memory: bool) -> list[dict]:
+    command = [sys.executable, os.path.abspath(__file__), "--child", str(logs), "--latency", str(latency_ms)]
+    if trace_memory:
+        command.append("--trace-memory")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {**os.environ, "NUTRIAPP_CACHE_DIR": cache_dir}
+        result = subprocess.run(command, capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_table(results: list[dict]):
+    print(f"{'logs':>7}  {'page':<30} {'render':<6} {'wall':>8} {'peak mem':>10} {'requests':>9}")
+    for row in results:
+        print(f"{row['logs']:>7}  {row['page']:<30} {row['render']:<6} {row['wall_s']:>7.3f}s "
+              f"{row['peak_mib']:>7.2f}MiB {row['requests']:>9}"
+              + (f"  ({row['exceptions']} exceptions)" if row["exceptions"] else "")
+              + (f"  errors: {'; '.join(row['errors'])}" if row["errors"] else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,1000,10000", help="comma-separated food logs per user")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub latency per request, ms")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--trace-memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure_size(args.child, args.latency, args.trace_memory)))
+        return
+
+    results = []
+    for logs in (int(size) for size in args.sizes.split(",")):
+        # tracemalloc slows everything down, so times and memory come from separate runs
+        timed_runs = run_child(logs, args.latency, trace_memory=False)
+        memory_runs = run_child(logs, args.latency, trace_memory=True)
+        for timed_run, memory_run in zip(timed_runs, memory_runs):
+            results.append({**timed_run, "peak_mib": memory_run["peak_mib"]})
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Local stand-in for the NutriApp backend, for benchmarks and offline development.
+
+Implements every endpoint the app calls (see utils/constants.py) with the same payload shapes.
+Each user gets a deterministic set of synthetic food logs on first use; any username/password logs in.
+
+    python benchmarks/stub_backend.py --port 8000 --logs 10000 --latency 50
+    NUTRIAPP_BACKEND_URL=http://127.0.0.1:8000/api/v1 streamlit run Home.py
+
+POST /auth/refresh-token trades a valid token for a new one, for NUTRIAPP_TOKEN_REFRESH_URL.
+GET /food-log honours updated_since, for NUTRIAPP_FOOD_LOG_SINCE_PARAM=updated_since.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/api/v1"
+TOKEN_SECRET = b"stub-backend"
+NUTRIENTS = [
+    "calories", "carbs", "protein", "fat", "sugar", "sodium", "potassium", "fiber", "iron", "calcium",
+    "cholesterol", "vitamin_a", "vitamin_c", "saturated_fat", "trans_fat", "polyunsaturated_fat",
+    "monounsaturated_fat",
+]
+# Typical value of each nutrient per logged item; synthetic logs scatter around these
+TYPICAL = {
+    "calories": 450, "carbs": 55, "protein": 22, "fat": 16, "sugar": 12, "sodium": 600, "potassium": 450,
+    "fiber": 5, "iron": 3, "calcium": 180, "cholesterol": 60, "vitamin_a": 900, "vitamin_c": 20,
+    "saturated_fat": 5, "trans_fat": 0.2, "polyunsaturated_fat": 3, "monounsaturated_fat": 6,
+}
+RECOMMENDED = {
+    "calories": 2200, "carbs": 275, "protein": 60, "fat": 70, "sugar": 50, "sodium": 2300, "potassium": 3500,
+    "fiber": 28, "iron": 18, "calcium": 1000, "cholesterol": 300, "vitamin_a": 3000, "vitamin_c": 90,
+    "saturated_fat": 20, "trans_fat": 2, "polyunsaturated_fat": 17, "monounsaturated_fat": 25,
+}
+MEAL_TYPES = ["Breakfast", "Lunch", "Dinner", "Snack"]
+FOODS = ["Oatmeal", "Chicken salad", "Rice and dal", "Apple", "Pasta", "Greek yogurt", "Omelette", "Paneer curry",
+         "Banana", "Grilled fish", "Veg sandwich", "Almonds"]
+PROFILE = {
+    "age": 30, "gender": "Female", "height_cm": 165.0, "weight_kg": 62.0, "bmi": 22.77, "chronic_disease": "NA",
+    "cholesterol_level": 180.0, "blood_sugar_level": 90.0, "blood_pressure_systolic": 120,
+    "blood_pressure_diastolic": 80, "daily_steps": 7000, "exercise_frequency": 3, "sleep_hours": 7.0,
+    "alcohol_consumption": "No", "smoking_habit": "No", "dietary_habits": "Regular", "preferred_cuisine": "Indian",
+    "food_aversions": "NA", "allergies": "NA", "genetic_risk_factor": "No", "calorie_intake": 2000.0,
+    "protein_intake": 50.0, "fat_intake": 70.0, "carbohydrate_intake": 250.0,
+}
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def make_token(user_id: str, ttl: int) -> str:
+    """HS256 JWT with sub and exp, like the real backend issues."""
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = _b64(json.dumps({"sub": user_id, "exp": int(time.time()) + ttl}).encode())
+    signature = hmac.new(TOKEN_SECRET, f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64(signature)}"
+
+
+def token_subject(token: str) -> str | None:
+    try:
+        header, payload, signature = token.split(".")
+        expected = _b64(hmac.new(TOKEN_SECRET, f"{header}.{payload}".encode(), hashlib.sha256).digest())
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, expected) or claims.get("exp", 0) < time.time():
+        return None
+    return claims.get("sub")
+
+
+def synthetic_logs(user_id: str, count: int, days: int) -> list[dict]:
+    """count logs spread over the last `days` days, newest first; the same user always gets the same logs."""
+    rng = random.Random(user_id)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    logs = []
+    for _ in range(count):
+        logged_at = now - timedelta(seconds=rng.randrange(days * 24 * 60 * 60))
+        log = {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "user_id": user_id,
+            "log_date": logged_at.isoformat(),
+            "meal_type": rng.choice(MEAL_TYPES),
+            "food": rng.choice(FOODS),
+            **{nutrient: round(typical * rng.uniform(0.3, 1.7), 2) for nutrient, typical in TYPICAL.items()},
+            "updated_at": logged_at.isoformat(),
+        }
+        logs.append(log)
+    logs.sort(key=lambda log: log["log_date"], reverse=True)
+    return logs
+
+
+class StubBackend:
+    """
+    In-memory backend state plus a threaded HTTP server serving it
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, logs: int = 1000, days: int = 365,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, token_ttl: int = 3600):
+        self.logs_per_user = logs
+        self.days = days
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_ttl = token_ttl
+
+        self._lock = threading.Lock()
+        self._logs: dict[str, list[dict]] = {}
+        self._profiles: dict[str, dict] = {}
+        self._idempotent: dict[str, dict] = {}
+        self.requests = Counter()  # "METHOD /path" -> count
+
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> "StubBackend":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-backend", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def request_count(self) -> int:
+        with self._lock:
+            return sum(self.requests.values())
+
+    # --- State ---
+
+    def logs(self, user_id: str) -> list[dict]:
+        with self._lock:
+            if user_id not in self._logs:
+                self._logs[user_id] = synthetic_logs(user_id, self.logs_per_user, self.days)
+                self._profiles.setdefault(user_id, {**PROFILE, "user_id": user_id})
+            return self._logs[user_id]
+
+    def login(self, username: str) -> dict:
+        user_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"nutriapp:{username}"))
+        return {"username": username, "user_id": user_id, "token": make_token(user_id, self.token_ttl),
+                "token_type": "bearer"}
+
+    def add_log(self, user_id: str, payload: dict, key: str | None) -> dict:
+        logs = self.logs(user_id)
+        with self._lock:
+            if key and key in self._idempotent:
+                return self._idempotent[key]
+            now = datetime.now(timezone.utc).isoformat()
+            log = {**payload, "id": str(uuid.uuid4()), "user_id": user_id, "updated_at": now}
+            # The backend stores log_date as a timestamp, so a posted "2024-05-01" comes back as a full datetime
+            logged_at = datetime.fromisoformat(log["log_date"])
+            log["log_date"] = (logged_at if logged_at.tzinfo else logged_at.replace(tzinfo=timezone.utc)).isoformat()
+            logs.insert(0, log)
+            if key:
+                self._idempotent[key] = log
+        return log
+
+    def delete_log(self, user_id: str, log_id: str) -> bool:
+        logs = self.logs(user_id)
+        with self._lock:
+            for i, log in enumerate(logs):
+                if log["id"] == log_id:
+                    del logs[i]
+                    return True
+        return False
+
+    def summary(self, user_id: str) -> dict:
+        logs = self.logs(user_id)
+        days = len({log["log_date"][:10] for log in logs}) or 1
+        average = {nutrient: round(sum(log.get(nutrient) or 0 for log in logs) / days, 2) for nutrient in NUTRIENTS}
+        return {"average": average, "recommended": dict(RECOMMENDED)}
+
+
+def _handler_for(backend: StubBackend):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        # --- Plumbing ---
+
+        def _reply(self, status: int, body=None):
+            data = json.dumps(body).encode() if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+                return {key: values[0] for key, values in parse_qs(raw.decode()).items()}
+            return json.loads(raw) if raw else {}
+
+        def _user(self) -> str | None:
+            auth = self.headers.get("Authorization", "")
+            return token_subject(auth[len("Bearer "):]) if auth.startswith("Bearer ") else None
+
+        def _dispatch(self, method: str):
+            url = urlsplit(self.path)
+            path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            segments = [segment for segment in path.split("/") if segment]
+            route = "/".join("{id}" if method == "DELETE" and i == 1 and segments[0] == "food-log" else segment
+                             for i, segment in enumerate(segments))
+            with backend._lock:
+                backend.requests[f"{method} /{route}"] += 1
+
+            if backend.latency_ms or backend.jitter_ms:
+                time.sleep(max(backend.latency_ms + random.uniform(-backend.jitter_ms, backend.jitter_ms), 0) / 1000)
+
+            try:
+                self._route(method, segments, query)
+            except (ValueError, KeyError) as e:
+                self._reply(422, {"detail": f"Invalid request: {e}"})
+
+        def _route(self, method: str, segments: list[str], query: dict):
+            if segments == ["auth", "login", "access-token"] and method == "POST":
+                form = self._body()
+                if not form.get("username") or not form.get("password"):
+                    return self._reply(400, {"detail": "Incorrect username or password"})
+                return self._reply(200, backend.login(form["username"]))
+            if segments == ["user", "register"] and method == "POST":
+                body = self._body()
+                return self._reply(200, {"email": body.get("email"), "full_name": body.get("full_name")})
+
+            user_id = self._user()
+            if user_id is None:
+                return self._reply(401, {"detail": "Could not validate credentials"})
+
+            if segments == ["auth", "refresh-token"] and method == "POST":
+                return self._reply(200, {"user_id": user_id, "token": make_token(user_id, backend.token_ttl),
+                                         "token_type": "bearer"})
+            if segments == ["user", "delete"] and method == "DELETE":
+                with backend._lock:
+                    backend._logs.pop(user_id, None)
+                    backend._profiles.pop(user_id, None)
+                return self._reply(200, {"message": "User deleted successfully"})
+
+            if segments == ["user-details"]:
+                backend.logs(user_id)
+                if method == "GET":
+                    profile = backend._profiles.get(user_id)
+                    return self._reply(200, profile) if profile else self._reply(404, {"detail": "Not found"})
+                if method in ("POST", "PATCH"):
+                    body = self._body()
+                    with backend._lock:
+                        profile = {**backend._profiles.get(user_id, {}), **body, "user_id": user_id}
+                        profile["bmi"] = round(profile["weight_kg"] / (profile["height_cm"] / 100) ** 2, 2)
+                        backend._profiles[user_id] = profile
+                    return self._reply(201 if method == "POST" else 200, profile)
+
+            if segments == ["food-log"] and method == "GET":
+                logs = backend.logs(user_id)
+                since = query.get("updated_since")
+                if since:
+                    logs = [log for log in logs if log["updated_at"] >= since]
+                skip, limit = int(query.get("skip", 0)), int(query.get("limit", 100))
+                return self._reply(200, {"data": logs[skip:skip + limit], "count": len(logs)})
+            if segments == ["food-log", "latest"] and method == "GET":
+                cutoff = (datetime.now(timezone.utc) - timedelta(days=int(query.get("days", 7)))).date().isoformat()
+                return self._reply(200, [log for log in backend.logs(user_id) if log["log_date"][:10] >= cutoff])
+            if segments == ["food-log"] and method == "POST":
+                log = backend.add_log(user_id, self._body(), self.headers.get("Idempotency-Key"))
+                return self._reply(201, log)
+            if segments == ["food-log", "nutrition-summary"] and method == "GET":
+                return self._reply(200, backend.summary(user_id))
+            if len(segments) == 2 and segments[0] == "food-log" and method == "DELETE":
+                if backend.delete_log(user_id, segments[1]):
+                    return self._reply(200, {"message": "Food log deleted successfully"})
+                return self._reply(404, {"detail": "Food log not found"})
+
+            if segments == ["predict", "diet"] and method == "POST":
+                body = self._body()
+                return self._reply(200, {"recommendation": "low sodium" if body.get("blood_pressure_systolic", 0) > 130
+                                         else "balanced"})
+
+            self._reply(404, {"detail": "Not Found"})
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--logs", type=int, default=1000, help="synthetic food logs per user")
+    parser.add_argument("--days", type=int, default=365, help="days the synthetic logs are spread over")
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency per request, ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +/- latency per request, ms")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="lifetime of issued tokens, seconds")
+    args = parser.parse_args()
+
+    backend = StubBackend(args.host, args.port, args.logs, args.days, args.latency, args.jitter, args.token_ttl)
+    print(f"Stub backend on {backend.url} ({args.logs} logs per user)")
+    try:
+        backend._server.serve_forever()
+    except KeyboardInterrupt:
+        backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,29 @@
-import pandas as pd
-import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, timedelta
+
 import streamlit as st
 from streamlit import switch_page
-import plotly.express as px
 
-from utils.constants import USER_DETAILS_URL, CustomError, LOGGED_IN, LOGOUT, APP_MAIN_PAGE, BMI_Category, \
-    LATEST_FOOD_LOG_URL, Button, LOG_FOOD_PAGE, DIET_PREDICT_URL, LOG_DATE, BMI, SIGN_IN_PAGE, NUTRIENT_ANALYSIS_PAGE
+from utils.constants import CustomError, LOGGED_IN, LOGOUT, APP_MAIN_PAGE, BMI_Category, \
+    Button, LOG_FOOD_PAGE, BMI, SIGN_IN_PAGE, NUTRIENT_ANALYSIS_PAGE, DASHBOARD_MAX_WORKERS, \
+    DASHBOARD_WINDOWS, DASHBOARD_DEFAULT_WINDOW, CUSTOM_WINDOW, DASHBOARD_WINDOW, DASHBOARD_RANGE
+from utils import api_client, auth, food_log_store
+from utils.figure_cache import cached_figure
+from utils.recommendation import get_diet_recommendation
+from utils.user_details import get_user_details
 from utils.helper import get_bmi_color
+from utils.lazy import lazy_import
+from utils.metrics import timed, render_debug_panel
+
+pd = lazy_import("pandas")
+requests = lazy_import("requests")
+px = lazy_import("plotly.express")
 
+@timed("dashboard.auth")
 def authenticate():
+    expired = not auth.check_session()
     if not st.session_state.get(LOGGED_IN, False):
-        st.warning(CustomError.E0001)
+        st.warning(CustomError.E0028 if expired else CustomError.E0001)
 
         if st.button("🔐 Go to Login Page"):
             switch_page(SIGN_IN_PAGE)
@@ -19,15 +32,48 @@ def authenticate():
 
 def logout_button():
     if st.button(f"⟳ {LOGOUT}", key=Button.LOGOUT_BUTTON, help="Click to logout"):
-        st.session_state.logged_in = False
-        st.session_state.username = ""
+        auth.sign_out()
         switch_page(APP_MAIN_PAGE)
 
-def fetch_user_details(headers):
+def predict_diet(user_future: Future, headers: dict):
+    """Runs on the loader pool: waits for the user details, then looks up the diet prediction."""
+    status_code, user_data = user_future.result()
+    if status_code != 200:
+        return None
+    return get_diet_recommendation(user_data, headers)
+
+def load_rollup(user_id: str, headers: dict):
+    """Runs on the loader pool: the daily rollup of the local mirror, or None if the sync failed."""
+    try:
+        food_log_store.refresh(user_id, headers)
+    except requests.exceptions.HTTPError:
+        return None
+    return food_log_store.daily_rollup(user_id)
+
+@timed("dashboard.start_fetches")
+def load_dashboard_data():
+    """
+    Start every backend call for the page in parallel and return their futures.
+    Worker threads have no Streamlit context, so the auth header is resolved here.
+    """
+    headers = api_client.auth_headers()
+    user_id = st.session_state.user_id
+    pool = ThreadPoolExecutor(max_workers=DASHBOARD_MAX_WORKERS, thread_name_prefix="dashboard-loader")
+    try:
+        user_future = pool.submit(get_user_details, user_id, headers)
+        logs_future = pool.submit(load_rollup, user_id, headers)
+        diet_future = pool.submit(predict_diet, user_future, headers)
+    finally:
+        # Don't wait here: each section renders as soon as its own result is ready
+        pool.shutdown(wait=False)
+    return user_future, logs_future, diet_future
+
+@timed("dashboard.fetch_user_details")
+def fetch_user_details(user_future: Future):
     try:
-        res = requests.get(USER_DETAILS_URL, headers=headers)
-        if res.status_code == 200:
-            return res.json()
+        status_code, user_data = user_future.result()
+        if status_code == 200:
+            return user_data
         else:
             st.info("📌 To unlock full features like BMI analysis and diet recommendations, please update your profile.")
             st.markdown("👉 Go to **User Profile** from the sidebar to update your profile.")
@@ -47,22 +93,16 @@ def classify_bmi(bmi):
     else:
         return BMI_Category.OBESE
 
-def fetch_food_logs(headers):
+@timed("dashboard.fetch_food_logs")
+def fetch_food_logs(logs_future: Future):
     try:
-        res = requests.get(LATEST_FOOD_LOG_URL, headers=headers)
-        if res.status_code != 200:
+        df = logs_future.result()
+        if df is None:
             st.warning(CustomError.E0012)
             st.markdown("👉 Go to **Log Food** from the sidebar.")
             st.button("Log Food Now", on_click=lambda: switch_page(LOG_FOOD_PAGE))
-            return pd.DataFrame()
+            return empty_rollup()
 
-        logs = res.json()
-        if not logs:
-            st.info(CustomError.E0013)
-            st.markdown("👉 Go to **Log Food** from the sidebar to get started.")
-            st.stop()
-
-        df = pd.DataFrame(logs)
         if df.empty:
             st.info(CustomError.E0013)
             st.markdown("👉 Go to **Log Food** from the sidebar to get started.")
@@ -72,9 +112,38 @@ def fetch_food_logs(headers):
     except Exception as e:
         st.error(CustomError.E0015)
         st.exception(e)
-        return pd.DataFrame()
+        return empty_rollup()
+
+def empty_rollup():
+    return food_log_store.typed_frame(pd.DataFrame(columns=food_log_store.ROLLUP_COLUMNS), date_column="day")
+
+@timed("dashboard.render_window_picker")
+def select_window():
+    """The date window the user picked, as (start, end, label) with both ends inclusive."""
+    today = date.today()
+    options = [*DASHBOARD_WINDOWS, CUSTOM_WINDOW]
+    choice = st.radio("Time window", options, index=options.index(DASHBOARD_DEFAULT_WINDOW), horizontal=True,
+                      key=DASHBOARD_WINDOW)
+
+    if choice != CUSTOM_WINDOW:
+        return today - timedelta(days=DASHBOARD_WINDOWS[choice] - 1), today, f"Last {choice}"
+
+    picked = st.date_input("Date range", value=(today - timedelta(days=29), today), max_value=today,
+                           key=DASHBOARD_RANGE) or (today,)
+    # While the user is still choosing the end date only the start is set
+    start, end = picked[0], picked[-1]
+    return start, end, f"{start:%b %d, %Y} – {end:%b %d, %Y}"
 
-def display_metrics(bmi, bmi_class, df):
+@timed("dashboard.slice_window")
+def slice_window(rollup, start, end):
+    """Rows of the day-sorted rollup between start and end (inclusive), without touching the raw logs."""
+    days = rollup["day"]
+    lo = days.searchsorted(pd.Timestamp(start))
+    hi = days.searchsorted(pd.Timestamp(end), side="right")
+    return rollup.iloc[lo:hi]
+
+@timed("dashboard.render_metrics")
+def display_metrics(bmi, bmi_class, df, label):
     col1, col2 = st.columns(2)
     bmi_color = get_bmi_color(bmi_class)
 
@@ -83,32 +152,27 @@ def display_metrics(bmi, bmi_class, df):
     <div style='font-size:36px; color:{bmi_color};'>{bmi} ({bmi_class})</div>
     """, unsafe_allow_html=True)
 
-    avg_cal = round(df['calories'].mean(), 1)
+    logs = df['logs'].sum()
+    avg_cal = round(df['calories'].sum() / logs, 1) if logs else 0
     col2.markdown(f"""
-    <div style='font-size:24px; font-weight:600;'>Avg Weekly Calories</div>
+    <div style='font-size:24px; font-weight:600;'>Avg Calories ({label})</div>
     <div style='font-size:36px; color:#2196F3;'>{avg_cal} kcal</div>
     """, unsafe_allow_html=True)
 
-def show_charts(df):
-    df[LOG_DATE] = pd.to_datetime(df[LOG_DATE])#.dt.date
-    daily_cal = df.groupby(LOG_DATE)['calories'].sum().reset_index()
-
-    st.subheader("Your Weekly Nutrition Overview")
-
-    st.markdown("#### Calories from Last 7 days")
-    # daily_cal[LOG_DATE] = pd.to_datetime(daily_cal[LOG_DATE]).dt.date
-    line_fig = px.line(daily_cal, x=LOG_DATE, y='calories', markers=True)
+def build_calorie_line(df):
+    daily_cal = df.groupby('day', as_index=False)['calories'].sum()
+    line_fig = px.line(daily_cal, x='day', y='calories', markers=True)
     line_fig.update_layout(
-        xaxis_tickformat="%b %d %H:%M",  # Example: Jun 03 14:15
+        xaxis_tickformat="%b %d",  # Example: Jun 03
         xaxis_title="Date",
         yaxis_title="Calories (kcal)",
         xaxis_title_font=dict(size=18),
         yaxis_title_font=dict(size=18),
         font=dict(size=16)
     )
-    st.plotly_chart(line_fig, use_container_width=True)
+    return line_fig
 
-    st.markdown("#### Macronutrient Breakdown")
+def build_macro_bar(df):
     macros = df[['protein', 'fat', 'carbs']].sum().to_dict()
     macro_df = pd.DataFrame.from_dict({k.capitalize(): v for k, v in macros.items()}, orient='index', columns=['g']).reset_index()
     macro_df.columns = ['Macronutrient', 'g']
@@ -122,23 +186,59 @@ def show_charts(df):
         legend=dict(font=dict(size=16)),
         font=dict(size=14)
     )
-    st.plotly_chart(bar_fig, use_container_width=True)
+    return bar_fig
 
-    st.markdown("#### Meal Type Distribution")
-    meal_dist = df['meal_type'].value_counts()
+def build_meal_pie(df):
+    meal_dist = df.groupby('meal_type', observed=True)['logs'].sum()
     pie_fig = px.pie(names=[m.capitalize() for m in meal_dist.index], values=meal_dist.values)
     pie_fig.update_layout(
         legend=dict(font=dict(size=16)),
         font=dict(size=14)
     )
-    st.plotly_chart(pie_fig, use_container_width=True)
+    return pie_fig
+
+@timed("dashboard.render_charts")
+def show_charts(df, label):
+    st.subheader(f"Your Nutrition Overview ({label})")
 
-def show_diet_recommendation(user_data, headers):
+    # Each chart only sees the columns it plots, so unrelated edits don't invalidate it
+    st.markdown("#### Daily Calories")
+    st.plotly_chart(cached_figure("calorie_line", df[['day', 'calories']], build_calorie_line),
+                    use_container_width=True)
+
+    st.markdown("#### Macronutrient Breakdown")
+    st.plotly_chart(cached_figure("macro_bar", df[['protein', 'fat', 'carbs']], build_macro_bar),
+                    use_container_width=True)
+
+    st.markdown("#### Meal Type Distribution")
+    st.plotly_chart(cached_figure("meal_pie", df[['meal_type', 'logs']], build_meal_pie), use_container_width=True)
+
+@st.fragment
+def render_overview(rollup, bmi, bmi_class):
+    """
+    Window picker, metrics and charts. Picking another window reruns only this section,
+    on the rollup the page already loaded.
+    """
+    auth.require_session()
+    start, end, label = select_window()
+    window = slice_window(rollup, start, end)
+    display_metrics(bmi, bmi_class, window, label)
+    st.divider()
+    if window.empty:
+        st.info(f"No food logged in this window ({label}).")
+    else:
+        show_charts(window, label)
+
+@st.fragment
+@timed("dashboard.fetch_diet_recommendation")
+def show_diet_recommendation(diet_future: Future):
+    """Runs again on its own for its button; the future has resolved by then, so nothing is refetched."""
+    auth.require_session()
     st.subheader("🍽️ Personalized Diet Recommendation")
     try:
-        res = requests.post(DIET_PREDICT_URL, json=user_data, headers=headers)
-        if res.status_code == 200:
-            recommendation = res.json().get("recommendation", "no recommendation available.").capitalize()
+        recommendation = diet_future.result()
+        if recommendation is not None:
+            recommendation = recommendation.capitalize()
             st.markdown(f"<div style='font-size:18px; color: green; font-weight: 600;'>✅ {recommendation}</div>", unsafe_allow_html=True)
         else:
             st.warning(CustomError.E0014)
@@ -151,9 +251,11 @@ def show_diet_recommendation(user_data, headers):
         st.error(CustomError.E0016)
         st.exception(e)
 
+@timed("dashboard.run")
 def run():
     try:
         st.set_page_config(page_title="Nutri Dashboard")
+        render_debug_panel()
 
         authenticate()
 
@@ -161,18 +263,17 @@ def run():
         st.sidebar.success(f"Welcome {st.session_state.username.capitalize()} 👋")
         logout_button()
 
-        headers = {"Authorization": f"Bearer {st.session_state.token}"}
-        user_data = fetch_user_details(headers)
+        user_future, logs_future, diet_future = load_dashboard_data()
+
+        user_data = fetch_user_details(user_future)
         bmi = user_data.get(BMI)
         bmi_class = classify_bmi(bmi)
 
-        df = fetch_food_logs(headers)
+        rollup = fetch_food_logs(logs_future)
 
-        display_metrics(bmi, bmi_class, df)
-        st.divider()
-        show_charts(df)
+        render_overview(rollup, bmi, bmi_class)
         st.divider()
-        show_diet_recommendation(user_data, headers)
+        show_diet_recommendation(diet_future)
 
     except requests.exceptions.ConnectionError:
         st.error(CustomError.E0025)
@@ -1,15 +1,24 @@
 import streamlit as st
-import requests
 from streamlit import switch_page
+from streamlit.errors import StreamlitAPIException
 
 from utils.constants import CustomError, LOGGED_IN, USER_DETAILS_URL, USER_ID, CustomSuccess, GENDERS, CHRONIC_DISEASES, \
-    OPTIONS, DIETARY_HABITS, CUISINES, ALLERGIES, FOOD_AVERSIONS, SIGN_IN_PAGE, DASHBOARD_PAGE
+    OPTIONS, DIETARY_HABITS, CUISINES, ALLERGIES, FOOD_AVERSIONS, SIGN_IN_PAGE, DASHBOARD_PAGE, \
+    PROFILE_CREATED
+from utils import api_client, auth
+from utils.user_details import get_user_details, update_user_details
+from utils.lazy import lazy_import
+from utils.metrics import timed, render_debug_panel
+
+requests = lazy_import("requests")
 
 
 # --- Authentication Check ---
+@timed("profile.auth")
 def authenticate():
+    expired = not auth.check_session()
     if not st.session_state.get(LOGGED_IN, False):
-        st.warning(CustomError.E0001)
+        st.warning(CustomError.E0028 if expired else CustomError.E0001)
 
         if st.button("🔐 Go to Login Page",help="Go to Login Page"):
             switch_page(SIGN_IN_PAGE)
@@ -19,13 +28,14 @@ def authenticate():
 
 
 # --- Fetch existing user details ---
-def fetch_user_details(headers: dict):
+@timed("profile.fetch_user_details")
+def fetch_user_details(user_id: str):
     try:
-        response = requests.get(USER_DETAILS_URL, headers=headers)
+        status_code, details = get_user_details(user_id)
 
-        if response.status_code == 200:
-            return True, response.json()
-        elif response.status_code == 404:
+        if status_code == 200:
+            return True, details
+        elif status_code == 404:
             st.info(CustomError.E0006)
             return False, {}
         else:
@@ -41,8 +51,23 @@ def fetch_user_details(headers: dict):
         st.error(f"An unexpected error occurred: {str(e)}")
         st.stop()
 
+def rerun_form():
+    """Rerun only the form when it is running as a fragment, the whole page otherwise."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
 # --- Form ---
-def user_details_form(form_defaults: dict, is_update: bool, headers: dict, user_id: str):
+# A fragment: saving reruns only the form. Its reruns reuse the arguments of the last full run,
+# so the details are read in here, where a save's write-through turns the next one into an update
+@st.fragment
+@timed("profile.render_form")
+def user_details_form(user_id: str):
+    auth.require_session()
+    is_update, form_defaults = fetch_user_details(user_id)
+
     with st.form("user_details_form"):
         st.subheader("Personal Info")
         age = st.number_input("Age", min_value=1, max_value=120, value=form_defaults.get("age", 25))
@@ -80,6 +105,9 @@ def user_details_form(form_defaults: dict, is_update: bool, headers: dict, user_
 
         submitted = st.form_submit_button("💾 Update" if is_update else "💾 Save")
 
+    if st.session_state.pop(PROFILE_CREATED, False):
+        st.success(CustomSuccess.S0003)
+
     if submitted:
         payload = {
             "age": age,
@@ -109,13 +137,19 @@ def user_details_form(form_defaults: dict, is_update: bool, headers: dict, user_
 
         try:
             if is_update:
-                res = requests.patch(USER_DETAILS_URL, json=payload, headers=headers)
+                res = api_client.patch(USER_DETAILS_URL, json=payload)
             else:
                 payload[USER_ID] = user_id
-                res = requests.post(USER_DETAILS_URL, json=payload, headers=headers)
+                res = api_client.post(USER_DETAILS_URL, json=payload)
 
             if res.status_code in (200, 201):
-                st.success(CustomSuccess.S0003)
+                update_user_details(user_id, payload, res)
+                if is_update:
+                    st.success(CustomSuccess.S0003)
+                else:
+                    # Redraw the form as an update: a click on the Save button it still shows would be lost
+                    st.session_state[PROFILE_CREATED] = True
+                    rerun_form()
             else:
                 st.error(f"Failed to save profile: {res.text}")
 
@@ -125,20 +159,19 @@ def user_details_form(form_defaults: dict, is_update: bool, headers: dict, user_
             st.error(f"An error occurred: {str(e)}")
 
 
+@timed("profile.run")
 def run():
     st.set_page_config(page_title="Update Profile")
+    render_debug_panel()
     st.title("Update Your Profile")
 
     try:
 
         authenticate()
 
-        token = st.session_state.token
         user_id = st.session_state.user_id
-        headers = {"Authorization": f"Bearer {token}"}
 
-        is_update, form_defaults = fetch_user_details(headers)
-        user_details_form(form_defaults, is_update, headers, user_id)
+        user_details_form(user_id)
 
         st.divider()
         if st.button("📊 Go to Dashboard", help="Click to go to Dashboard"):
@@ -1,99 +1,198 @@
+import csv
+import io
+import time
+
 import streamlit as st
-import requests
 from datetime import date
 from streamlit import switch_page
 
 from utils.constants import (
-    FOOD_LOG_URL, CustomError, CustomSuccess,
-    SIGN_IN_PAGE, LOGGED_IN, VIEW_FOOD_LOG_PAGE
+    CustomError, CustomSuccess, LOG_DATE,
+    SIGN_IN_PAGE, LOGGED_IN, VIEW_FOOD_LOG_PAGE, MEAL_TYPES, FOOD_LOG_NUTRIENTS, IMPORT_FILE_TYPES,
+    FOOD_INPUT, NUTRIENT_INPUT_PREFIX
 )
+from utils import api_client, auth, outbox
+from utils.food_db import get_food_db
+from utils.food_log_import import read_upload, run_import, IMPORTED, INVALID, FAILED
+from utils.helper import validate_food_log
+from utils.lazy import lazy_import
+from utils.metrics import timed, render_debug_panel
+
+requests = lazy_import("requests")
 
 
+@timed("log_food.auth")
 def authenticate():
+    expired = not auth.check_session()
     if not st.session_state.get(LOGGED_IN, False):
-        st.warning(CustomError.E0001)
+        st.warning(CustomError.E0028 if expired else CustomError.E0001)
         if st.button("🔐 Go to Login Page", help="Go to Login Page"):
             switch_page(SIGN_IN_PAGE)
         st.stop()
 
 
+def fill_food_log_form(food: str, nutrients: dict):
+    """Copy a food database match into the form inputs."""
+    st.session_state[FOOD_INPUT] = food
+    for nutrient, value in nutrients.items():
+        st.session_state[f"{NUTRIENT_INPUT_PREFIX}{nutrient}"] = value
+
+
+@timed("log_food.render_food_search")
+def render_food_search():
+    """Look the food up in the bundled database and auto-fill the form, scaled to the portion."""
+    query = st.text_input("🔎 Search food database", placeholder="e.g. chicken breast")
+    if not query:
+        return
+
+    db = get_food_db()
+    matches = db.search(query)
+    if not matches:
+        st.caption("No matching foods. Enter the nutrients manually below.")
+        return
+
+    col1, col2 = st.columns([3, 1])
+    food_id = col1.selectbox("Matches", matches, format_func=db.name)
+    grams = col2.number_input("Portion (g)", min_value=1.0, value=100.0, step=10.0)
+    st.button("✍️ Fill form", on_click=fill_food_log_form, args=(db.name(food_id), db.nutrients(food_id, grams)),
+              help="Fill the food name and nutrients below")
+
+
+@timed("log_food.render_form")
 def render_food_log_form():
     with st.form("food_log_form"):
         log_date = st.date_input("Date", value=date.today())
-        food = st.text_input("Food Item")
-        meal_type = st.selectbox("Meal Type", ["Breakfast", "Lunch", "Dinner", "Snack"])
+        food = st.text_input("Food Item", key=FOOD_INPUT)
+        meal_type = st.selectbox("Meal Type", MEAL_TYPES)
 
         nutrients = {
-            "calories": st.number_input("Calories", min_value=0.0),
-            "carbs": st.number_input("Carbs (g)", min_value=0.0),
-            "protein": st.number_input("Protein (g)", min_value=0.0),
-            "fat": st.number_input("Fat (g)", min_value=0.0),
-            "sugar": st.number_input("Sugar (g)", min_value=0.0, format="%.2f"),
-            "sodium": st.number_input("Sodium (mg)", min_value=0.0, format="%.2f"),
-            "potassium": st.number_input("Potassium (mg)", min_value=0.0, format="%.2f"),
-            "fiber": st.number_input("Fiber (g)", min_value=0.0, format="%.2f"),
-            "iron": st.number_input("Iron (mg)", min_value=0.0, format="%.2f"),
-            "calcium": st.number_input("Calcium (mg)", min_value=0.0, format="%.2f"),
-            "cholesterol": st.number_input("Cholesterol (mg)", min_value=0.0, format="%.2f"),
-            "vitamin_a": st.number_input("Vitamin A (IU)", min_value=0.0, format="%.2f"),
-            "vitamin_c": st.number_input("Vitamin C (mg)", min_value=0.0, format="%.2f"),
-            "saturated_fat": st.number_input("Saturated Fat (g)", min_value=0.0, format="%.2f"),
-            "trans_fat": st.number_input("Trans Fat (g)", min_value=0.0, format="%.2f"),
-            "polyunsaturated_fat": st.number_input("Polyunsaturated Fat (g)", min_value=0.0, format="%.2f"),
-            "monounsaturated_fat": st.number_input("Monounsaturated Fat (g)", min_value=0.0, format="%.2f"),
+            "calories": st.number_input("Calories", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}calories"),
+            "carbs": st.number_input("Carbs (g)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}carbs"),
+            "protein": st.number_input("Protein (g)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}protein"),
+            "fat": st.number_input("Fat (g)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}fat"),
+            "sugar": st.number_input("Sugar (g)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}sugar", format="%.2f"),
+            "sodium": st.number_input("Sodium (mg)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}sodium", format="%.2f"),
+            "potassium": st.number_input("Potassium (mg)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}potassium", format="%.2f"),
+            "fiber": st.number_input("Fiber (g)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}fiber", format="%.2f"),
+            "iron": st.number_input("Iron (mg)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}iron", format="%.2f"),
+            "calcium": st.number_input("Calcium (mg)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}calcium", format="%.2f"),
+            "cholesterol": st.number_input("Cholesterol (mg)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}cholesterol", format="%.2f"),
+            "vitamin_a": st.number_input("Vitamin A (IU)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}vitamin_a", format="%.2f"),
+            "vitamin_c": st.number_input("Vitamin C (mg)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}vitamin_c", format="%.2f"),
+            "saturated_fat": st.number_input("Saturated Fat (g)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}saturated_fat", format="%.2f"),
+            "trans_fat": st.number_input("Trans Fat (g)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}trans_fat", format="%.2f"),
+            "polyunsaturated_fat": st.number_input("Polyunsaturated Fat (g)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}polyunsaturated_fat", format="%.2f"),
+            "monounsaturated_fat": st.number_input("Monounsaturated Fat (g)", min_value=0.0, key=f"{NUTRIENT_INPUT_PREFIX}monounsaturated_fat", format="%.2f"),
         }
 
         submitted = st.form_submit_button("💾 Save")
         if submitted:
 
             if submitted:
-                errors = []
-                if not food.strip():
-                    errors.append(CustomError.E0022)
-                if nutrients['calories'] <= 0:
-                    errors.append(CustomError.E0023)
+                payload = {
+                    "log_date": str(log_date),
+                    "food": food,
+                    "meal_type": meal_type,
+                    "user_id": st.session_state.user_id,
+                    **nutrients
+                }
+                errors = validate_food_log(payload)
 
                 if errors:
                     for e in errors:
                         st.warning(e)
                 else:
-                    payload = {
-                        "log_date": str(log_date),
-                        "food": food,
-                        "meal_type": meal_type,
-                        "user_id": st.session_state.user_id,
-                        **nutrients
-                    }
                     return payload
     return None
 
 
+@timed("log_food.submit")
 def submit_food_log(payload):
-    headers = {
-        "Authorization": f"Bearer {st.session_state.token}"
-    }
-
+    """Queue the log in the local outbox; the background worker delivers it."""
     try:
-        response = requests.post(FOOD_LOG_URL, json=payload, headers=headers)
-        if response.status_code == 201:
-            st.success(CustomSuccess.S0004)
-
-        else:
-            st.error(CustomError.E0017)
-    except requests.exceptions.RequestException:
-        st.error(CustomError.E0018)
+        outbox.enqueue(st.session_state.user_id, st.session_state.token, payload)
+        st.success(CustomSuccess.S0008)
     except Exception as e:
-        st.error(f"⚠️ Unexpected error: {str(e)}")
-
-
+        st.error(f"{CustomError.E0017} {str(e)}")
+
+
+@timed("log_food.render_outbox_status")
+def render_outbox_status():
+    """How many logs are still on their way, and any the backend refused."""
+    user_id = st.session_state.user_id
+    pending = outbox.pending_count(user_id)
+    if pending:
+        st.info(f"⏳ {pending} food log(s) waiting to be sent.")
+
+    rejected = outbox.rejected_entries(user_id)
+    if rejected:
+        st.warning(f"{CustomError.E0017} {len(rejected)} queued log(s) were refused by the server.")
+        with st.expander("Show refused logs"):
+            st.dataframe([{k: entry[k] for k in (LOG_DATE, "food", "meal_type", "error")} for entry in rejected],
+                         use_container_width=True, hide_index=True)
+            st.button("Dismiss", on_click=outbox.dismiss_rejected, args=(user_id,), help="Remove refused logs")
+
+
+def render_import_report(results: list[dict]):
+    """Summary counts, the rows that need attention and the full per-row report as CSV."""
+    st.success(CustomSuccess.S0007)
+    counts = {status: 0 for status in (IMPORTED, INVALID, FAILED)}
+    for result in results:
+        counts[result["status"]] += 1
+
+    for col, (status, count) in zip(st.columns(3), counts.items()):
+        col.metric(status, count)
+
+    problems = [result for result in results if result["status"] != IMPORTED]
+    if problems:
+        st.dataframe(problems, use_container_width=True, hide_index=True)
+
+    report = io.StringIO()
+    writer = csv.DictWriter(report, fieldnames=["row", "food", "status", "detail"])
+    writer.writeheader()
+    writer.writerows(results)
+    st.download_button("⬇️ Download import report", report.getvalue(), file_name="food_log_import_report.csv",
+                       mime="text/csv", help="Result of every row in the file")
+
+
+@timed("log_food.bulk_import")
+def render_bulk_import():
+    """Upload a CSV/JSON export and submit every valid row."""
+    st.markdown(f"Columns: `log_date`, `food`, `meal_type`, {', '.join(f'`{n}`' for n in FOOD_LOG_NUTRIENTS)}")
+    upload = st.file_uploader("Upload a CSV, JSON or JSON Lines file", type=IMPORT_FILE_TYPES)
+
+    if upload and st.button("📥 Import", help="Import every row of the file"):
+        progress = st.progress(0.0, text="Importing...")
+        last_update = 0.0
+
+        def on_progress(processed: int):
+            nonlocal last_update
+            # Throttle: each progress update is a message to the browser
+            if time.monotonic() - last_update > 0.2:
+                last_update = time.monotonic()
+                progress.progress(min(upload.tell() / max(upload.size, 1), 1.0), text=f"{processed} rows processed")
+
+        results = run_import(read_upload(upload), st.session_state.user_id, api_client.auth_headers(), on_progress)
+        progress.progress(1.0, text=f"{len(results)} rows processed")
+        render_import_report(results)
+
+
+@timed("log_food.run")
 def run():
+    render_debug_panel()
     st.title("🍽️ Log Your Food Intake")
 
     try:
         authenticate()
-        payload = render_food_log_form()
-        if payload:
-            submit_food_log(payload)
+        render_outbox_status()
+        single_tab, import_tab = st.tabs(["Single entry", "Bulk import"])
+        with single_tab:
+            render_food_search()
+            payload = render_food_log_form()
+            if payload:
+                submit_food_log(payload)
+        with import_tab:
+            render_bulk_import()
 
         st.divider()
         if st.button("📋 View Food Logs", help="Click to go view food logs"):
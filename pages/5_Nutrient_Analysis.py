@@ -1,42 +1,58 @@
 import streamlit as st
-import requests
-import pandas as pd
-import plotly.graph_objects as go
 from streamlit import switch_page
 
-from utils.constants import CustomError, SIGN_IN_PAGE, LOGGED_IN, NUTRIENT_ANALYSIS_URL, DISPLAY_NAME_MAP
+from utils.constants import CustomError, SIGN_IN_PAGE, LOGGED_IN, DISPLAY_NAME_MAP
+from utils import api_client, auth, data_cache, food_log_store
+from utils.figure_cache import cached_figure
+from utils.helper import render_intake_table, INTAKE_TABLE_CSS
+from utils.nutrition_summary import get_nutrition_summary
+from utils.lazy import lazy_import
+from utils.metrics import timed, render_debug_panel
+
+requests = lazy_import("requests")
+pd = lazy_import("pandas")
+go = lazy_import("plotly.graph_objects")
 
 
 # ---------------- Auth Check ----------------
+@timed("analysis.auth")
 def authenticate():
+    expired = not auth.check_session()
     if not st.session_state.get(LOGGED_IN, False):
-        st.warning(CustomError.E0001)
+        st.warning(CustomError.E0028 if expired else CustomError.E0001)
         if st.button("🔐 Go to Login Page"):
             switch_page(SIGN_IN_PAGE)
         st.stop()
 
 
 # ---------------- Data Fetching ----------------
+@timed("analysis.fetch_summary")
 def fetch_nutrient_data():
-
-    token = st.session_state.get("token")
-
-    headers = {"Authorization": f"Bearer {token}"}
+    """Summary computed from the local log mirror; the backend is only waited for on a first visit."""
+    user_id = st.session_state.user_id
     try:
-        response = requests.get(NUTRIENT_ANALYSIS_URL, headers=headers)
-        if response.status_code != 200:
-            st.error(CustomError.E0022)
-            st.stop()
-        return response.json()
+        data = get_nutrition_summary(user_id, api_client.auth_headers())
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         st.stop()
 
+    if data is None:
+        st.error(CustomError.E0021)
+        st.stop()
+    return data
+
+
+@timed("analysis.render_differences")
+def render_differences(differences: dict):
+    """Note the nutrients whose server-side average disagrees with the one shown."""
+    if differences:
+        names = ", ".join(DISPLAY_NAME_MAP.get(nutrient, nutrient) for nutrient in differences)
+        st.caption(f"ℹ️ The server reports different averages for: {names}. "
+                   f"The values below are computed from your synced food logs.")
+
 
 # ---------------- Data Preparation ----------------
-def prepare_nutrient_dataframe(data):
-    avg = data["average"]
-    rec = data["recommended"]
+def build_nutrient_dataframe(avg: dict, rec: dict):
     nutrients = [DISPLAY_NAME_MAP.get(nutrient, nutrient) for nutrient in avg.keys()]
 
     df = pd.DataFrame({
@@ -48,32 +64,27 @@ def prepare_nutrient_dataframe(data):
     return df
 
 
-# ---------------- Styling ----------------
-def highlight(val):
-    if val < 70:
-        return 'background-color: #f08080'  # red
-    elif val < 100:
-        return 'background-color: #fffacd'  # yellow
-    return 'background-color: #90ee90'      # green
+@timed("analysis.prepare_dataframe")
+def prepare_nutrient_dataframe(data):
+    """The intake table for this summary, shared by all of the user's sessions."""
+    user_id = st.session_state.user_id
+    avg = data["average"]
+    rec = data["recommended"]
+    return data_cache.get_or_build(
+        user_id, "nutrient_table", lambda: build_nutrient_dataframe(avg, rec),
+        params=(tuple(avg.items()), tuple(rec.items())), version=food_log_store.data_version(user_id),
+    )
 
 
+# ---------------- Table ----------------
+@timed("analysis.render_table")
 def render_styled_table(df):
     st.subheader("📋 Nutrient Intake Table")
-    styled_df = (
-        df.style
-        .applymap(highlight, subset=["% Met"])
-        .format(precision=2)
-        .set_table_styles([
-            {'selector': 'td', 'props': [('font-size', '16px')]},
-            {'selector': 'th', 'props': [('font-size', '18px')]}
-        ])
-    )
-    st.markdown(styled_df.to_html(), unsafe_allow_html=True)
+    st.markdown(INTAKE_TABLE_CSS + render_intake_table(df), unsafe_allow_html=True)
 
 
 # ---------------- Plot ----------------
-def render_bar_chart(df):
-    st.subheader("📉 Actual vs Recommended Nutrient Intake")
+def build_bar_chart(df):
     fig = go.Figure()
     fig.add_trace(go.Bar(x=df["Nutrient"], y=df["Average"], name="Average Intake"))
     fig.add_trace(go.Bar(x=df["Nutrient"], y=df["Recommended"], name="Recommended Intake"))
@@ -96,18 +107,28 @@ def render_bar_chart(df):
             font=dict(size=18)
         )
     )
+    return fig
+
+
+@timed("analysis.render_chart")
+def render_bar_chart(df):
+    st.subheader("📉 Actual vs Recommended Nutrient Intake")
+    fig = cached_figure("intake_bar", df[["Nutrient", "Average", "Recommended"]], build_bar_chart)
     st.plotly_chart(fig, use_container_width=True)
 
 
 # ---------------- Main ----------------
+@timed("analysis.run")
 def run():
 
     st.set_page_config(page_title="Nutrient Analysis", layout="wide")
+    render_debug_panel()
     st.title("📊 Macro & Micro Nutrient Analysis")
 
     try:
         authenticate()
         data = fetch_nutrient_data()
+        render_differences(data["differences"])
         df = prepare_nutrient_dataframe(data)
         render_styled_table(df)
         render_bar_chart(df)
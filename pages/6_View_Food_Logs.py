@@ -1,105 +1,263 @@
+from datetime import timedelta
+
 import streamlit as st
-import requests
-import pandas as pd
 from streamlit import switch_page
+from streamlit.errors import StreamlitAPIException
 
 from utils.constants import (
-    FOOD_LOG_URL, NUMERIC_NUTRIENTS, CustomError,
-    SIGN_IN_PAGE, DELETE_FOOD_LOG_URL_TEMPLATE, LOG_DATE, CustomSuccess, LOGGED_IN
+    NUMERIC_NUTRIENTS, CustomError, SIGN_IN_PAGE, DELETE_FOOD_LOG_URL_TEMPLATE, LOG_DATE, CustomSuccess, LOGGED_IN,
+    FOOD_LOG_PAGE_SIZES, FOOD_LOG_DEFAULT_PAGE_SIZE, LOG_PAGE_INDEX, LOG_PAGE_SIZE, LOG_JUMP_DATE,
+    LOG_PENDING_DELETES, LOG_DELETE_REPORT
 )
-from utils.helper import prepare_view
+from utils import api_client, auth, data_cache, food_log_store
+from utils.batch import submit_each
+from utils.helper import prepare_views
+from utils.lazy import lazy_import
+from utils.metrics import stage, timed, render_debug_panel
+
+requests = lazy_import("requests")
 
 
+@timed("food_logs.auth")
 def authenticate():
     """Check if the user is logged in; if not, show login button and stop."""
+    expired = not auth.check_session()
     if not st.session_state.get(LOGGED_IN, False):
-        st.warning(CustomError.E0001)
+        st.warning(CustomError.E0028 if expired else CustomError.E0001)
         if st.button("🔐 Go to Login Page", help="Go to Login Page"):
             switch_page(SIGN_IN_PAGE)
         st.stop()
 
 
-def fetch_food_logs():
-    """Fetch food logs from API."""
-    headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    return requests.get(FOOD_LOG_URL, headers=headers)
+@timed("food_logs.clean")
+def clean_food_logs(df):
+    """Round the nutrients, sort newest first and rename for display; the store already typed every column."""
+    df[NUMERIC_NUTRIENTS] = df[NUMERIC_NUTRIENTS].round(2)
+    df = df.sort_values(by=LOG_DATE, ascending=False)
+
+    # Rename for display
+    return df.rename(columns={
+        "log_date": "Date",
+        "meal_type": "Meal Type",
+        "food": "Food"
+    })
+
+
+@timed("food_logs.fetch_logs")
+def fetch_food_logs(page: int, page_size: int):
+    """
+    One cleaned page of food logs from the local mirror, syncing it with the backend first.
+    The page is built once per data version and shared by all of the user's sessions.
+    """
+    user_id = st.session_state.user_id
+    food_log_store.refresh(user_id, api_client.auth_headers())
+    total = food_log_store.count_logs(user_id)
+    df = data_cache.get_or_build(
+        user_id, "food_log_page",
+        lambda: clean_food_logs(food_log_store.query_logs(user_id, offset=page * page_size, limit=page_size)),
+        params=(page, page_size), version=food_log_store.data_version(user_id),
+    )
+    return df, total
+
+
+def rerun_section():
+    """Rerun only the log list when it is running as a fragment, the whole page otherwise."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+def reset_page():
+    st.session_state[LOG_PAGE_INDEX] = 0
+
+
+def jump_to_date():
+    """Move to the page that holds the selected date."""
+    target = st.session_state.get(LOG_JUMP_DATE)
+    if target is None:
+        return
+    # Logs are listed newest first, so the target's page is set by how many logs are newer than it
+    newer = food_log_store.count_logs(st.session_state.user_id, start_date=target + timedelta(days=1))
+    st.session_state[LOG_PAGE_INDEX] = newer // st.session_state[LOG_PAGE_SIZE]
+
+
+def render_page_controls():
+    """Page size and jump-to-date controls."""
+    col1, col2 = st.columns(2)
+    col1.selectbox("Entries per page", FOOD_LOG_PAGE_SIZES, key=LOG_PAGE_SIZE, on_change=reset_page)
+    col2.date_input("Jump to date", value=None, key=LOG_JUMP_DATE, on_change=jump_to_date)
 
 
-def delete_log(log_id):
+def render_page_navigation(page: int, page_size: int, total: int):
+    """Previous / next buttons for the current window."""
+    last_page = max(total - 1, 0) // page_size
+    col1, col2, col3 = st.columns([1, 2, 1])
+    if col1.button("⬅️ Previous", disabled=page == 0, help="Newer entries"):
+        st.session_state[LOG_PAGE_INDEX] = page - 1
+        rerun_section()
+    col2.markdown(f"<div style='text-align:center'>Page {page + 1} of {last_page + 1}</div>", unsafe_allow_html=True)
+    if col3.button("Next ➡️", disabled=page >= last_page, help="Older entries"):
+        st.session_state[LOG_PAGE_INDEX] = page + 1
+        rerun_section()
+
+
+def delete_log(log_id, headers: dict):
     """Delete a specific food log entry by ID."""
-    headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    return requests.delete(DELETE_FOOD_LOG_URL_TEMPLATE.format(log_id), headers=headers)
+    return api_client.delete(DELETE_FOOD_LOG_URL_TEMPLATE.format(log_id), headers=headers)
+
+
+def selection_key(log_id) -> str:
+    return f"select_{log_id}"
 
 
-def render_log_entry(row, log_id, index):
-    """Render a single food log entry as an expandable panel."""
-    row = row.to_dict()
-    date = row.pop('Date').date()
+def delete_logs(log_ids: list):
+    """
+    Optimistically drop the entries from the local mirror and send the deletes
+    concurrently; settle_pending_deletes() waits for them and rolls back failures.
+    """
+    user_id = st.session_state.user_id
+    rows = {row['id']: row for row in food_log_store.get_logs(user_id, log_ids)}
+    food_log_store.remove_logs(user_id, log_ids)
 
-    meal_type = row.pop('Meal Type').capitalize()
-    food = row.pop('Food')
-    row.pop('id', None)
+    futures = submit_each(delete_log, list(rows), api_client.auth_headers())
+    st.session_state[LOG_PENDING_DELETES] = {future: rows[log_id] for future, log_id in futures.items()}
+    for log_id in log_ids:
+        st.session_state.pop(selection_key(log_id), None)
 
-    with st.expander(f"{date} - {meal_type} - {food}"):
-        st.markdown(prepare_view(row), unsafe_allow_html=True)
 
-        if st.button("🗑️ Delete", key=f"delete_{index}", help="Delete Food Log"):
-            delete_resp = delete_log(log_id)
-            if delete_resp.status_code == 200:
-                st.success(CustomSuccess.S0005)
-            else:
-                st.error(CustomError.E0021)
+@timed("food_logs.settle_deletes")
+def settle_pending_deletes():
+    """Wait for in-flight deletes, restore the entries whose delete failed and report the outcome."""
+    pending = st.session_state.pop(LOG_PENDING_DELETES, None)
+    if not pending:
+        return
+
+    failed = []
+    with st.spinner(f"Deleting {len(pending)} entries..."):
+        for future, row in pending.items():
+            try:
+                # 404: already gone on the backend, which is what we wanted
+                if future.result().status_code in (200, 204, 404):
+                    continue
+            except requests.exceptions.RequestException:
+                pass
+            failed.append(row)
+
+    if failed:
+        food_log_store.add_logs(st.session_state.user_id, failed)
+    st.session_state[LOG_DELETE_REPORT] = (len(pending) - len(failed), failed)
+    rerun_section()
+
+
+def render_delete_report():
+    """Show the outcome of the last delete, once."""
+    report = st.session_state.pop(LOG_DELETE_REPORT, None)
+    if report is None:
+        return
+
+    deleted, failed = report
+    if deleted:
+        st.success(f"{CustomSuccess.S0005} ({deleted} entries)")
+    for row in failed:
+        st.error(f"{CustomError.E0020} {str(row[LOG_DATE])[:10]} - {row['meal_type']} - {row['food']}")
+
+
+def render_bulk_actions(log_ids: list):
+    """Select-all and batch delete controls for the current page."""
+    selected = [log_id for log_id in log_ids if st.session_state.get(selection_key(log_id))]
+
+    def select_all():
+        for log_id in log_ids:
+            st.session_state[selection_key(log_id)] = True
+
+    col1, col2 = st.columns(2)
+    col1.button("☑️ Select all on this page", on_click=select_all, help="Select every entry shown")
+    col2.button(f"🗑️ Delete selected ({len(selected)})", on_click=delete_logs, args=(selected,),
+                disabled=not selected, type="primary", help="Delete all selected entries")
+
+
+@timed("food_logs.build_views")
+def build_log_views(df):
+    """Build every entry header and detail body in one vectorized pass over the frame."""
+    headers = (
+        df['Date'].dt.strftime('%Y-%m-%d')
+        + " - " + df['Meal Type'].astype(str).str.capitalize()
+        + " - " + df['Food'].astype(str)
+    )
+    details = prepare_views(df.drop(columns=['Date', 'Meal Type', 'Food', 'id'], errors='ignore'))
+    return headers, details
+
+
+def render_log_entry(log_id, header, details):
+    """Render a single food log entry as a selectable, expandable panel."""
+    col1, col2 = st.columns([1, 15])
+    col1.checkbox("Select", key=selection_key(log_id), label_visibility="collapsed")
+    with col2.expander(header):
+        st.markdown(details, unsafe_allow_html=True)
+        st.button("🗑️ Delete", key=f"delete_{log_id}", on_click=delete_logs, args=([log_id],),
+                  help="Delete Food Log")
 
 
 def display_food_logs():
-    """Fetch, process, and display user's food logs."""
+    """Fetch, process, and display one page of the user's food logs."""
     try:
-        response = fetch_food_logs()
+        st.session_state.setdefault(LOG_PAGE_INDEX, 0)
+        st.session_state.setdefault(LOG_PAGE_SIZE, FOOD_LOG_DEFAULT_PAGE_SIZE)
+        page, page_size = st.session_state[LOG_PAGE_INDEX], st.session_state[LOG_PAGE_SIZE]
 
-        if response.status_code != 200:
-            detail = response.json().get('detail', 'Unknown error')
+        try:
+            df, total = fetch_food_logs(page, page_size)
+            if df.empty and page > 0:
+                # The page emptied out, e.g. after deleting its last entries
+                st.session_state[LOG_PAGE_INDEX] = max(total - 1, 0) // page_size
+                rerun_section()
+        except requests.exceptions.HTTPError as e:
+            detail = e.response.json().get('detail', 'Unknown error')
             st.error(f"{CustomError.E0020}: {detail}")
             return
 
-        logs = response.json().get('data', [])
         st.subheader("📒 Your Latest Food Logs")
+        render_delete_report()
+        render_page_controls()
 
-        if not logs:
+        if df.empty:
             st.info(CustomError.EOO19)
             return
 
-        df = pd.DataFrame(logs)
-
-        # Data Cleaning
-        for col in NUMERIC_NUTRIENTS:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').round(2)
+        # The id column travels through the sort, so entries never map back by position
+        headers, details = build_log_views(df)
+        render_bulk_actions(df['id'].tolist())
+        with stage("food_logs.render_entries"):
+            for log_id, header, body_html in zip(df['id'], headers, details):
+                render_log_entry(log_id, header, body_html)
 
-        df[LOG_DATE] = pd.to_datetime(df[LOG_DATE])
-        df = df.sort_values(by=LOG_DATE, ascending=False)
-
-        # Rename for display
-        df = df.rename(columns={
-            "log_date": "Date",
-            "meal_type": "Meal Type",
-            "food": "Food"
-        })
-
-        for i, row in df.iterrows():
-            row_id = logs[i].get("id")
-            render_log_entry(row, row_id, i)
+        render_page_navigation(page, page_size, total)
 
     except Exception as e:
         st.error(f"Error {e}")
 
 
+@st.fragment
+def render_food_logs():
+    """
+    The log list and its controls. Paging, selecting and deleting rerun only this section,
+    which reads the local mirror; the backend only sees the deletes themselves.
+    """
+    auth.require_session()
+    display_food_logs()
+    settle_pending_deletes()
+
+
+@timed("food_logs.run")
 def run():
     st.set_page_config(page_title="View Food Logs")
+    render_debug_panel()
 
     try:
 
         authenticate()
-        display_food_logs()
+        render_food_logs()
 
     except requests.exceptions.ConnectionError:
         st.error(CustomError.E0025)
@@ -1,8 +1,12 @@
 import streamlit as st
-import requests
 from streamlit import switch_page
-from utils.constants import AUTH_TOKEN, LOGIN_URL, LOGGED_IN, USERNAME, USER_ID, Button, LOGIN, CustomSuccess, \
-    DASHBOARD_PAGE, CustomError, LOGOUT, APP_MAIN_PAGE, TOKEN
+from utils.constants import LOGIN_URL, LOGGED_IN, USERNAME, USER_ID, Button, LOGIN, CustomSuccess, \
+    DASHBOARD_PAGE, CustomError, LOGOUT, APP_MAIN_PAGE, TOKEN, PREWARM_ON_LOGIN, PREWARM_MODULES
+from utils import api_client, auth
+from utils.lazy import lazy_import, prewarm
+from utils.metrics import timed, render_debug_panel
+
+requests = lazy_import("requests")
 
 
 # ------------------------
@@ -23,15 +27,16 @@ def init_session_state():
 # ------------------------
 # API Call
 # ------------------------
+@timed("sign_in.request_login")
 def authenticate_user(username, password):
-    headers = {"Authorization": f"Bearer {AUTH_TOKEN}"}
-    response = requests.post(LOGIN_URL, data={"username": username, "password": password}, headers=headers)
+    response = api_client.post(LOGIN_URL, data={"username": username, "password": password})
     return response
 
 
 # ------------------------
 # Login Logic
 # ------------------------
+@timed("sign_in.render_login_form")
 def login_form():
     st.title(Button.SIGN_IN_BUTTON.value)
 
@@ -43,11 +48,9 @@ def login_form():
             response = authenticate_user(username, password)
 
             if response.status_code == 200:
-                data = response.json()
-                st.session_state.logged_in = True
-                st.session_state.username = data.get(USERNAME)
-                st.session_state.user_id = data.get(USER_ID)
-                st.session_state.token = data.get(TOKEN)
+                auth.sign_in(response.json())
+                if PREWARM_ON_LOGIN:
+                    prewarm(PREWARM_MODULES)
 
                 st.success(CustomSuccess.S0001)
                 switch_page(DASHBOARD_PAGE)
@@ -64,6 +67,7 @@ def login_form():
 # ------------------------
 # Logout Logic
 # ------------------------
+@timed("sign_in.render_logout")
 def logout_section():
     st.success(f"You're logged in as **{st.session_state.username}**")
 
@@ -77,19 +81,22 @@ def logout_section():
         colA, colB = st.columns([1, 2])
         with colB:
             if st.button(f"⟳ {LOGOUT}", key=Button.LOGOUT_BUTTON, help="Click to logout"):
-                for key in [LOGGED_IN, USERNAME, USER_ID, TOKEN]:
-                    st.session_state[key] = None if key != LOGGED_IN else False
+                auth.sign_out()
                 switch_page(APP_MAIN_PAGE)
 
 
 
 
+@timed("sign_in.run")
 def run():
     st.set_page_config(page_title="Sign In", page_icon="🔐")
+    render_debug_panel()
 
     try:
 
         init_session_state()
+        if not auth.check_session():
+            st.warning(CustomError.E0028)
 
         if st.session_state.logged_in:
             logout_section()
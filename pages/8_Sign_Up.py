@@ -1,12 +1,16 @@
 import time
 
 import streamlit as st
-import requests
 from pydantic import EmailStr, BaseModel, Field, ValidationError
 from streamlit import switch_page
 
-from utils.constants import LOGIN_URL, LOGGED_IN, USERNAME, USER_ID, AUTH_TOKEN, REGISTER_URL, DASHBOARD_PAGE, \
-    CustomError, CustomSuccess, TOKEN
+from utils.constants import LOGIN_URL, LOGGED_IN, USERNAME, USER_ID, REGISTER_URL, DASHBOARD_PAGE, \
+    CustomError, CustomSuccess, TOKEN, PREWARM_ON_LOGIN, PREWARM_MODULES
+from utils import api_client, auth
+from utils.lazy import lazy_import, prewarm
+from utils.metrics import timed, render_debug_panel
+
+requests = lazy_import("requests")
 
 
 # Pydantic model for local validation
@@ -34,6 +38,7 @@ def init_session_state():
 # ------------------------
 # Sign Up Logic
 # ------------------------
+@timed("sign_up.render_form")
 def signup_form():
     st.title("📝 Create Your NutriApp Account")
 
@@ -49,20 +54,18 @@ def signup_form():
             form = SignUpForm(email=email, password=password, full_name=full_name)
 
             with st.spinner("Creating your account..."):
-                reg_response = requests.post(REGISTER_URL, json=form.model_dump())
+                reg_response = api_client.post(REGISTER_URL, json=form.model_dump())
 
             if reg_response.status_code == 200:
                 st.success(CustomSuccess.S0002)
 
                 # Automatically log in the user
-                login_response = requests.post(LOGIN_URL, data={"username": email, "password": password})
+                login_response = api_client.post(LOGIN_URL, data={"username": email, "password": password})
 
                 if login_response.status_code == 200:
-                    data = login_response.json()
-                    st.session_state.logged_in = True
-                    st.session_state.username = data.get(USERNAME)
-                    st.session_state.user_id = data.get(USER_ID)
-                    st.session_state.token = data.get(TOKEN)
+                    auth.sign_in(login_response.json())
+                    if PREWARM_ON_LOGIN:
+                        prewarm(PREWARM_MODULES)
                     st.success(f"Welcome {st.session_state.username.capitalize()}!")
                     st.success(f"Your Email ID is your username")
                     st.success("Redirecting to Dashboard...")
@@ -81,8 +84,10 @@ def signup_form():
             for error in ve.errors():
                 st.warning(f"{error['loc'][0].capitalize()}: {error['msg']}")
 
+@timed("sign_up.run")
 def run():
     st.set_page_config(page_title="Sign Up | NutriApp")
+    render_debug_panel()
 
     try:
 
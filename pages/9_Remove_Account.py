@@ -1,33 +1,42 @@
 import time
 import streamlit as st
-import requests
 from streamlit import switch_page
 
 from utils.constants import DELETE_USER_URL, LOGGED_IN, CustomError, SIGN_IN_PAGE, CustomSuccess, APP_MAIN_PAGE
+from utils import api_client, auth, food_log_store, outbox
+from utils.nutrition_summary import forget_nutrition_summary
+from utils.user_details import invalidate_user_details
+from utils.lazy import lazy_import
+from utils.metrics import timed, render_debug_panel
 
+requests = lazy_import("requests")
 
+
+@timed("remove_account.auth")
 def authenticate_user():
     """Ensure the user is logged in; otherwise, redirect to login page."""
+    expired = not auth.check_session()
     if not st.session_state.get(LOGGED_IN, False):
-        st.warning(CustomError.E0001)
+        st.warning(CustomError.E0028 if expired else CustomError.E0001)
         if st.button("🔐 Go to Login Page", help="Go to Login Page"):
             switch_page(SIGN_IN_PAGE)
         st.stop()
 
 
+@timed("remove_account.request_delete")
 def delete_user_account(password: str):
     """Send DELETE request to delete the user account."""
-    headers = {"Authorization": f"Bearer {st.session_state.token}"}
     params = {"confirmation_pwd": password}
-    return requests.delete(DELETE_USER_URL, headers=headers, params=params)
+    return api_client.delete(DELETE_USER_URL, params=params)
 
 
 def clear_session_and_redirect():
     """Clear session state and redirect to home."""
-    st.session_state.logged_in = False
-    st.session_state.username = ""
-    st.session_state.token = ""
-    st.session_state.user_id = None
+    invalidate_user_details(st.session_state.user_id)
+    food_log_store.forget_user(st.session_state.user_id)
+    forget_nutrition_summary(st.session_state.user_id)
+    outbox.forget_user(st.session_state.user_id)
+    auth.sign_out()
 
     st.success(CustomSuccess.S0006)
     st.info("You will be redirected shortly...")
@@ -35,6 +44,7 @@ def clear_session_and_redirect():
     switch_page(APP_MAIN_PAGE)
 
 
+@timed("remove_account.render_form")
 def render_delete_form():
     """Render the delete account form UI."""
     st.title("⚠️ Delete Your Account")
@@ -53,8 +63,10 @@ def render_delete_form():
             st.error(response.json().get("detail", CustomError.E0024))
 
 
+@timed("remove_account.run")
 def run():
     st.set_page_config(page_title="Delete Account | NutriApp")
+    render_debug_panel()
 
     try:
         authenticate_user()
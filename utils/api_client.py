@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import streamlit as st
+
+from utils.constants import TOKEN, REQUEST_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_MAX_RETRIES, \
+    HTTP_RETRY_BACKOFF, HTTP_RETRY_STATUSES
+from utils import http_telemetry
+from utils.lazy import lazy_import
+
+requests = lazy_import("requests")
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """
+    Build a session with keep-alive pooling and retries for idempotent verbs
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # The session is shared by every user of the process, so never keep cookies between calls
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide pooled session, creating it on first use
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def auth_headers(token: str | None = None) -> dict:
+    """
+    Bearer header for the given token, or the logged-in user's token.
+    Must be called from the script thread when no token is passed.
+    """
+    token = token or st.session_state.get(TOKEN)
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def request(method: str, url: str, headers: dict | None = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session with default timeouts and auth.
+    Every call is recorded in the HTTP telemetry, including ones that never got a response.
+    """
+    headers = dict(headers or {})
+    if "Authorization" not in headers:
+        headers.update(auth_headers())
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+
+    start = time.perf_counter()
+    try:
+        response = get_session().request(method, url, headers=headers, **kwargs)
+    except requests.exceptions.RequestException:
+        http_telemetry.record(method, url, time.perf_counter() - start, http_telemetry.ERROR)
+        raise
+    http_telemetry.record_response(method, url, time.perf_counter() - start, response,
+                                   streamed=kwargs.get("stream", False))
+    return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def patch(url: str, **kwargs) -> requests.Response:
+    return request("PATCH", url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request("DELETE", url, **kwargs)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import streamlit as st
+
+from utils import api_client, outbox
+from utils.batch import submit
+from utils.cache import LRUCache
+from utils.constants import LOGGED_IN, USERNAME, USER_ID, TOKEN, TOKEN_REFRESH_URL, TOKEN_REFRESH_AHEAD, \
+    TOKEN_EXPIRY_LEEWAY, TOKEN_CACHE_SIZE, CustomError
+
+# Bearer tokens are JWTs. Their exp claim is read locally (checking the signature is the backend's job)
+# so an expired token is never sent: pages call check_session() before any request, which refreshes the
+# token in the background ahead of expiry when TOKEN_REFRESH_URL is set, and otherwise signs the user out.
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_inflight: dict[str, Future] = {}  # old token -> refresh in progress
+_refreshed = LRUCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_REFRESH_AHEAD)  # old token -> new token
+
+
+def token_expiry(token: str | None) -> float | None:
+    """The token's exp claim as a Unix timestamp, or None if it has none or isn't a JWT."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError, binascii.Error):
+        return None
+
+
+def token_expired(token: str | None) -> bool:
+    """True once the token is within TOKEN_EXPIRY_LEEWAY of its exp; tokens without one never expire here."""
+    expires_at = token_expiry(token)
+    return expires_at is not None and time.time() >= expires_at - TOKEN_EXPIRY_LEEWAY
+
+
+def sign_in(data: dict):
+    """Store the login response in the session."""
+    st.session_state[LOGGED_IN] = True
+    st.session_state[USERNAME] = data.get(USERNAME)
+    st.session_state[USER_ID] = data.get(USER_ID)
+    st.session_state[TOKEN] = data.get(TOKEN)
+
+
+def sign_out():
+    st.session_state[LOGGED_IN] = False
+    st.session_state[USERNAME] = ""
+    st.session_state[USER_ID] = None
+    st.session_state[TOKEN] = None
+
+
+def _refresh(user_id: str, token: str):
+    try:
+        response = api_client.post(TOKEN_REFRESH_URL, headers=api_client.auth_headers(token))
+        new_token = response.json().get(TOKEN) if response.status_code == 200 else None
+    except Exception:
+        logger.exception("Refreshing a token failed")
+        return
+    if new_token:
+        _refreshed.set(token, new_token)
+        # Queued logs needn't wait for the user's next page load to use it
+        outbox.remember_token(user_id, new_token)
+
+
+def _refresh_in_background(user_id: str, token: str):
+    """Trade the token for a new one unless that is already under way."""
+    with _lock:
+        future = _inflight.get(token)
+        if future is None or future.done():
+            future = submit(_refresh, user_id, token)
+            _inflight[token] = future
+            future.add_done_callback(lambda _: _inflight.pop(token, None))
+
+
+def check_session() -> bool:
+    """
+    Keep the logged-in user's token usable; call from the script thread before any request.
+    Swaps in a token refreshed in the background, starts a refresh once the token is within
+    TOKEN_REFRESH_AHEAD of expiring, and signs the user out once it has expired. A usable
+    token is handed to the outbox, so logs queued with an older one keep going out.
+    Returns False when the session has just expired.
+    """
+    token = st.session_state.get(TOKEN)
+    if not st.session_state.get(LOGGED_IN, False) or not token:
+        return True
+
+    new_token = _refreshed.pop(token)
+    if new_token is not None:
+        st.session_state[TOKEN] = token = new_token
+
+    # A token without a readable exp is left for the backend to judge
+    expires_at = token_expiry(token)
+    if expires_at is not None and time.time() >= expires_at - TOKEN_EXPIRY_LEEWAY:
+        sign_out()
+        return False
+
+    user_id = st.session_state.get(USER_ID)
+    if user_id:
+        outbox.remember_token(user_id, token)
+    if expires_at is not None and TOKEN_REFRESH_URL and time.time() >= expires_at - TOKEN_REFRESH_AHEAD:
+        _refresh_in_background(user_id, token)
+    return True
+
+
+def require_session():
+    """
+    check_session() for fragments, whose reruns skip the page's own authentication:
+    call at the top of the fragment; stops it with a prompt once the session has expired.
+    """
+    if not check_session() or not st.session_state.get(LOGGED_IN, False):
+        st.warning(CustomError.E0028)
+        st.stop()
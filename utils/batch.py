@@ -0,0 +1,18 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from utils.constants import BATCH_MAX_WORKERS
+
+# Shared by every session so bulk actions can't open more than BATCH_MAX_WORKERS requests at once
+_pool = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="batch-request")
+
+
+def submit(fn, *args, **kwargs) -> Future:
+    return _pool.submit(fn, *args, **kwargs)
+
+
+def submit_each(fn, items, *args, **kwargs) -> dict[Future, object]:
+    """
+    Start fn(item, *args, **kwargs) for every item on the bounded pool.
+    Returns a future -> item mapping so results can be matched back.
+    """
+    return {_pool.submit(fn, item, *args, **kwargs): item for item in items}
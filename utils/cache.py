@@ -0,0 +1,111 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache with an optional per-entry TTL (seconds).
+    With ``max_bytes`` the total ``sizeof(value)`` is bounded as well.
+    Instances are meant to live at module level so every session of the process shares them.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None, max_bytes: int | None = None, sizeof=len):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._data = OrderedDict()  # key -> (expires_at, value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            expires_at, value, _ = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Would evict everything else and still not fit
+            self.pop(key)
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[2]
+        return item
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._remove(key)
+        return default if item is None else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def keys(self) -> list:
+        """Snapshot of the keys, least recently used first (expired ones included)."""
+        with self._lock:
+            return list(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteStore:
+    """
+    Minimal persistent key/value store (JSON values) backing an in-memory cache
+    """
+
+    def __init__(self, path: str, table: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set(self, key: str, value):
+        with self._lock, self._conn:
+            self._conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)",
+                               (key, json.dumps(value)))
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
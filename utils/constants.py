@@ -1,20 +1,23 @@
+import os
 from enum import Enum, unique
 
 # === Backend Base URL ===
 # BACKEND_URL = "http://localhost:8000/api/v1"
-BACKEND_URL = "https://7c1f-2401-4900-93ed-1784-b87e-ef5b-4af4-381.ngrok-free.app/api/v1"
+BACKEND_URL = os.environ.get(
+    "NUTRIAPP_BACKEND_URL", "https://7c1f-2401-4900-93ed-1784-b87e-ef5b-4af4-381.ngrok-free.app/api/v1"
+)
 
 # === Authentication ===
 LOGIN_URL = f"{BACKEND_URL}/auth/login/access-token"
-AUTH_TOKEN = (
-    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
-    "eyJleHAiOjE3NDU2NzgyNjQsInN1YiI6IjEzNTA3MjUxLTkxZmEtNDI1MS05NDY5LWZmYjk5MWU3N2VjMiJ9."
-    "X4fEOk_CopHgJSDIe5yVPNds5KZQRBfxhy3vHYUO0D0"
-)
+# Optional endpoint trading a still-valid bearer token for a new one; without it users sign in again on expiry
+TOKEN_REFRESH_URL = os.environ.get("NUTRIAPP_TOKEN_REFRESH_URL") or None
+TOKEN_REFRESH_AHEAD = 300  # seconds before expiry a background refresh starts
+TOKEN_EXPIRY_LEEWAY = 30  # seconds; a token this close to expiry is treated as expired
+TOKEN_CACHE_SIZE = 4096  # refreshed tokens waiting for their session's next run
 
 # === Food Log ===
 FOOD_LOG_URL = f"{BACKEND_URL}/food-log"
-LATEST_FOOD_LOG_URL = f"{FOOD_LOG_URL}/latest/?days=7"
+FOOD_LOG_LATEST_URL = f"{FOOD_LOG_URL}/latest/"  # ?days=N: logs of the last N days, as a bare list
 DELETE_FOOD_LOG_URL_TEMPLATE = f"{FOOD_LOG_URL}/{{}}"  # format with log ID
 DIET_PREDICT_URL = f"{BACKEND_URL}/predict/diet"
 NUTRIENT_ANALYSIS_URL = f"{FOOD_LOG_URL}/nutrition-summary/"
@@ -24,6 +27,87 @@ USER_DETAILS_URL = f"{BACKEND_URL}/user-details"
 REGISTER_URL = f"{BACKEND_URL}/user/register"
 DELETE_USER_URL = f"{BACKEND_URL}/user/delete"
 
+# === HTTP Client ===
+REQUEST_TIMEOUT = (3.05, 30)  # (connect, read) in seconds
+HTTP_POOL_CONNECTIONS = 4  # number of hosts kept in the pool
+HTTP_POOL_MAXSIZE = 20  # keep-alive connections per host, shared by all sessions
+HTTP_MAX_RETRIES = 3
+HTTP_RETRY_BACKOFF = 0.5  # 0.5s, 1s, 2s between attempts
+HTTP_RETRY_STATUSES = (502, 503, 504)
+DASHBOARD_MAX_WORKERS = 3  # user details, food logs and diet prediction
+BATCH_MAX_WORKERS = 8  # concurrent requests for bulk actions, across all sessions
+
+# === Bulk Import ===
+IMPORT_MAX_IN_FLIGHT = 32  # rows submitted but not yet answered, per import
+IMPORT_MAX_RETRIES = 3
+IMPORT_CHUNK_SIZE = 64 * 1024  # bytes read from the uploaded file at a time
+IMPORT_FILE_TYPES = ["csv", "json", "jsonl"]
+
+# === Client-side Caches ===
+USER_DETAILS_CACHE_TTL = 300  # seconds
+USER_DETAILS_CACHE_SIZE = 1024  # users kept per process
+DIET_CACHE_SIZE = 2048  # recommendations kept in memory
+DIET_CACHE_PERSIST = True  # also keep recommendations on disk under CACHE_DIR
+FIGURE_CACHE_SIZE = 256  # chart specs kept in memory
+FIGURE_CACHE_MAX_BYTES = 32 * 1024 * 1024  # total size of the cached chart specs
+TABLE_CACHE_SIZE = 256  # rendered HTML tables kept in memory
+TABLE_CACHE_MAX_BYTES = 8 * 1024 * 1024
+DATA_CACHE_SIZE = 4096  # per-user frames and responses shared by all sessions
+DATA_CACHE_MAX_BYTES = 256 * 1024 * 1024  # memory budget of the shared data cache
+DATA_CACHE_TTL = 900  # seconds an entry is kept after it was built; reads do not extend it
+NUTRITION_CACHE_SIZE = 1024  # users whose recommended-intake table is kept in memory
+NUTRITION_RECONCILE_INTERVAL = 300  # seconds before the backend summary is fetched again in the background
+NUTRITION_MISMATCH_TOLERANCE = 0.01  # relative difference between backend and local averages that gets flagged
+
+# === Startup ===
+PREWARM_ON_LOGIN = True  # import the libraries the logged-in pages need while the user is redirected
+PREWARM_MODULES = ["requests", "numpy", "pandas", "plotly.express", "plotly.graph_objects", "plotly.io"]
+
+# === Instrumentation ===
+METRICS_ENABLED = os.environ.get("NUTRIAPP_METRICS", "") == "1"  # time page stages; off costs nothing
+METRICS_EXPORT_INTERVAL = 15  # seconds between writes of the Prometheus text file
+METRICS_DEBUG_PARAM = "metrics"  # open a page with ?debug=metrics to see the timings in the sidebar
+HTTP_TELEMETRY_ENABLED = os.environ.get("NUTRIAPP_HTTP_TELEMETRY", "1") == "1"
+HTTP_TELEMETRY_WINDOW = 15 * 60  # seconds of backend calls kept per endpoint
+HTTP_TELEMETRY_MAX_SAMPLES = 5000  # per endpoint, whatever the window
+HTTP_TELEMETRY_DUMP_INTERVAL = 60  # seconds between JSON/CSV dumps
+
+# === Dashboard ===
+DASHBOARD_WINDOWS = {"7 days": 7, "30 days": 30, "90 days": 90, "365 days": 365}
+DASHBOARD_DEFAULT_WINDOW = "7 days"
+CUSTOM_WINDOW = "Custom"
+
+# === Food Log Browsing ===
+FOOD_LOG_PAGE_SIZES = [10, 25, 50, 100]
+FOOD_LOG_DEFAULT_PAGE_SIZE = 25
+
+# === Local Storage ===
+CACHE_DIR = os.environ.get("NUTRIAPP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "nutriapp"))
+FOOD_DB_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "foods.csv")
+FOOD_SEARCH_LIMIT = 10
+FOOD_LOG_DB = "food_logs.sqlite"
+METRICS_FILE = os.environ.get("NUTRIAPP_METRICS_FILE", os.path.join(CACHE_DIR, "metrics.prom"))
+HTTP_TELEMETRY_DIR = os.environ.get("NUTRIAPP_TELEMETRY_DIR", CACHE_DIR)
+FOOD_LOG_SYNC_INTERVAL = 30  # seconds before a page load triggers a background delta sync
+FOOD_LOG_FULL_SYNC_INTERVAL = 6 * 60 * 60  # full resyncs pick up deletes made outside this app
+FOOD_LOG_SYNC_BATCH = 500  # logs per sync request
+FOOD_LOG_STREAM_CHUNK_SIZE = 64 * 1024  # bytes of a sync response read at a time
+FOOD_LOG_SYNC_WORKERS = 4
+# Query parameter filtering food logs by update time. Set it only for a backend known to support it; without
+# one, delta syncs re-read the FOOD_LOG_DELTA_DAYS window from FOOD_LOG_LATEST_URL instead
+FOOD_LOG_SINCE_PARAM = os.environ.get("NUTRIAPP_FOOD_LOG_SINCE_PARAM") or None
+FOOD_LOG_DELTA_DAYS = 7  # days of logs a delta sync re-reads; updates to older logs wait for the full sync
+FOOD_LOG_SYNC_MAX_PAGES = 1000  # hard stop for a backend that never stops paging
+FOOD_LOG_SYNC_SKEW = 60  # seconds subtracted from the last sync time to absorb clock skew
+
+# === Offline Outbox ===
+OUTBOX_DB = "outbox.sqlite"
+OUTBOX_POLL_INTERVAL = 5  # seconds between flush attempts when nothing new was queued
+OUTBOX_BACKOFF_BASE = 2  # seconds; doubles with every failed attempt
+OUTBOX_BACKOFF_MAX = 300
+OUTBOX_FLUSH_BATCH = 50
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
 # === Streamlit Pages ===
 APP_MAIN_PAGE = "Home.py"
 SIGN_UP_PAGE = "pages/8_Sign_Up.py"
@@ -42,6 +126,16 @@ LOGOUT = "Logout"
 USERNAME = "username"
 USER_ID = "user_id"
 TOKEN = "token"
+DASHBOARD_WINDOW = "dashboard_window"
+DASHBOARD_RANGE = "dashboard_range"
+LOG_PAGE_INDEX = "food_log_page"
+LOG_PAGE_SIZE = "food_log_page_size"
+LOG_JUMP_DATE = "food_log_jump_date"
+LOG_PENDING_DELETES = "food_log_pending_deletes"
+LOG_DELETE_REPORT = "food_log_delete_report"
+PROFILE_CREATED = "profile_created"
+FOOD_INPUT = "log_food_input"
+NUTRIENT_INPUT_PREFIX = "log_nutrient_"
 
 
 @unique
@@ -64,7 +158,21 @@ DIETARY_HABITS = ["Regular", "Keto", "Vegetarian", "Vegan"]
 CUISINES = ["Indian", "Asian", "Western", "Mediterranean"]
 FOOD_AVERSIONS = ["NA", "Spicy", "Sweet", "Salty"]
 ALLERGIES = ["NA", "Lactose Intolerance", "Nut Allergy", "Gluten Intolerance"]
+# Profile fields the diet model is fed with; a change in any of them changes the recommendation
+DIET_MODEL_FIELDS = [
+    "age", "gender", "height_cm", "weight_kg", "bmi", "chronic_disease", "cholesterol_level",
+    "blood_sugar_level", "blood_pressure_systolic", "blood_pressure_diastolic", "daily_steps",
+    "exercise_frequency", "sleep_hours", "alcohol_consumption", "smoking_habit", "dietary_habits",
+    "preferred_cuisine", "food_aversions", "allergies", "genetic_risk_factor", "calorie_intake",
+    "protein_intake", "fat_intake", "carbohydrate_intake",
+]
+MEAL_TYPES = ["Breakfast", "Lunch", "Dinner", "Snack"]
 LOG_DATE = 'log_date'
+FOOD_LOG_NUTRIENTS = [
+    'calories', 'carbs', 'protein', 'fat', 'sugar', 'sodium', 'potassium', 'fiber', 'iron', 'calcium',
+    'cholesterol', 'vitamin_a', 'vitamin_c', 'saturated_fat', 'trans_fat', 'polyunsaturated_fat',
+    'monounsaturated_fat',
+]
 NUMERIC_NUTRIENTS = ['calories', 'protein', 'carbs', 'fat']
 
 DISPLAY_NAME_MAP = {
@@ -114,6 +222,10 @@ class CustomError(str, Enum):
     E0023 = "❌ Please enter a non-zero calorie value."
     E0024 = "❌ Failed to delete your account."
     E0025 = "⚠️ Cannot connect to the server. Please check your internet connection or try again later."
+    E0026 = "❌ Could not read this row."
+    E0027 = "⚠️ Please choose a valid meal type."
+    E0028 = "⌛ Your session has expired. Please log in again."
+    E0029 = "❌ Could not read the rest of the file."
 
     def __str__(self):
         return self.value
@@ -125,8 +237,10 @@ class CustomSuccess(str, Enum):
     S0002 = "Account created successfully! Logging you in..."
     S0003 = "User profile saved successfully!"
     S0004 = "Food log created successfully."
-    S0005 = "✅ Deleted successfully. Please refresh the page."
+    S0005 = "✅ Deleted successfully."
     S0006 = "✅ Your account has been deleted successfully."
+    S0007 = "✅ Import finished."
+    S0008 = "✅ Food log saved. It will be sent to your account in the background."
 
     def __str__(self):
         return self.value
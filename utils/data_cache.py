@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import pickle
+import threading
+
+from utils.cache import LRUCache
+from utils.constants import DATA_CACHE_SIZE, DATA_CACHE_MAX_BYTES, DATA_CACHE_TTL
+from utils.lazy import lazy_import
+from utils.metrics import stage
+
+pd = lazy_import("pandas")
+
+# Process-wide cache of per-user data (DataFrames, response dicts) shared by every session of the replica.
+# Keys are (user_id, endpoint, params, data version): the user id comes first and is required, so a lookup
+# can only ever reach that user's entries, and a write that bumps the version retires the old entries.
+# All entries share one memory budget. Frames are built once and each caller gets its own copy for the
+# run, so a change one session makes never reaches the others or the cached frame. The copies are plain
+# deep copies rather than copy-on-write shallow ones: that would need pandas' global copy_on_write mode,
+# which changes pandas semantics for every module. Copying even a multi-year rollup takes under a millisecond.
+
+_lock = threading.Lock()
+_building: dict[tuple, threading.Lock] = {}
+_versions: dict[str, dict[str, int]] = {}  # user_id -> endpoint -> latest version cached
+
+
+def sizeof(value) -> int:
+    """Approximate memory held by a cached value, in bytes."""
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+_cache = LRUCache(maxsize=DATA_CACHE_SIZE, ttl=DATA_CACHE_TTL, max_bytes=DATA_CACHE_MAX_BYTES, sizeof=sizeof)
+
+
+def _share(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    return value
+
+
+def _retire_older(user_id: str, endpoint: str, version):
+    """Drop the user's entries for this endpoint built from an older data version."""
+    if version is None:
+        return
+    with _lock:
+        endpoints = _versions.setdefault(user_id, {})
+        previous = endpoints.get(endpoint)
+        if previous is not None and previous >= version:
+            return
+        endpoints[endpoint] = version
+    for key in [key for key in _cache.keys() if key[:2] == (user_id, endpoint) and key[3] != version]:
+        _cache.pop(key)
+
+
+def get_or_build(user_id: str, endpoint: str, build, params: tuple = (), version: int | None = None):
+    """
+    Return the cached value for the user's (endpoint, params, version), calling ``build()``
+    on a miss. Concurrent sessions asking for the same entry wait for a single build.
+    Frames come back as copies: read them or modify them, the cached one never changes.
+    """
+    if not user_id:
+        raise ValueError("Cached data must belong to a user")
+
+    key = (user_id, endpoint, params, version)
+    value = _cache.get(key)
+    if value is not None:
+        return _share(value)
+
+    with _lock:
+        building = _building.setdefault(key, threading.Lock())
+    with building:
+        value = _cache.get(key)
+        if value is None:
+            with stage(f"data_cache.{endpoint}.build"):
+                value = build()
+            _retire_older(user_id, endpoint, version)
+            _cache.set(key, value)
+    with _lock:
+        _building.pop(key, None)
+    return _share(value)
+
+
+def forget_user(user_id: str):
+    """Drop every entry of the user, e.g. when the account is removed."""
+    for key in [key for key in _cache.keys() if key[0] == user_id]:
+        _cache.pop(key)
+    with _lock:
+        _versions.pop(user_id, None)
+
+
+def usage() -> dict:
+    return {"entries": len(_cache), "bytes": _cache.nbytes, "max_bytes": DATA_CACHE_MAX_BYTES}
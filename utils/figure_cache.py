@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from utils.cache import LRUCache
+from utils.constants import FIGURE_CACHE_SIZE, FIGURE_CACHE_MAX_BYTES
+from utils.helper import frame_fingerprint
+from utils.lazy import lazy_import
+from utils.metrics import stage
+
+pd = lazy_import("pandas")
+pio = lazy_import("plotly.io")
+
+# Serialized figure specs (JSON strings) keyed by chart name, input content and chart parameters.
+# Keeping the JSON rather than the Figure bounds memory by its real size and hands every
+# session its own Figure object, so one page can't mutate another's chart.
+_cache = LRUCache(maxsize=FIGURE_CACHE_SIZE, max_bytes=FIGURE_CACHE_MAX_BYTES)
+
+
+def cached_figure(name: str, df: pd.DataFrame, build, **params):
+    """
+    Return the figure ``build(df, **params)`` would produce, building it only when
+    this chart has not been drawn for identical data and parameters before.
+    """
+    key = (name, frame_fingerprint(df), repr(sorted(params.items())))
+    spec = _cache.get(key)
+    if spec is None:
+        with stage(f"figure.{name}.build"):
+            spec = build(df, **params).to_json()
+        _cache.set(key, spec)
+    return pio.from_json(spec)
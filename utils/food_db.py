@@ -0,0 +1,132 @@
+import csv
+import math
+import mmap
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+from utils.constants import FOOD_LOG_NUTRIENTS, CACHE_DIR, FOOD_DB_FILE, FOOD_SEARCH_LIMIT
+
+# Bundled food-composition table; every nutrient is given per 100 g, in the units the Log Food form uses.
+# On first use it is compiled into a flat float32 file under CACHE_DIR that is memory-mapped,
+# so the numbers are paged in by the OS instead of being parsed into Python objects.
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _write_atomically(path: str, data: bytes):
+    """Write next to the target and swap in, so a concurrent reader never maps a half-written file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class FoodDatabase:
+    """
+    Read-only food table with a word-prefix index and a trigram index for typo-tolerant search
+    """
+
+    def __init__(self, csv_path: str, cache_dir: str):
+        self._csv_path = csv_path
+        self._values_path = os.path.join(cache_dir, "foods.f32")
+        self._names_path = os.path.join(cache_dir, "foods.names")
+
+        self._compile_if_stale()
+        with open(self._names_path, encoding="utf-8") as f:
+            self._names = f.read().split("\n")
+        with open(self._values_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._values = memoryview(self._mmap).cast("f")
+
+        normalized = [_normalize(name) for name in self._names]
+        # Sorted (prefix key, food id) pairs: every word of a name, plus the whole name for multi-word queries
+        self._prefixes = sorted(
+            (key, food_id)
+            for food_id, name in enumerate(normalized)
+            for key in {name, *name.split()}
+        )
+        self._trigram_index: dict[str, array] = {}
+        for food_id, name in enumerate(normalized):
+            for gram in _trigrams(name):
+                self._trigram_index.setdefault(gram, array("H")).append(food_id)
+
+    def _compile_if_stale(self):
+        if os.path.exists(self._values_path) and os.path.exists(self._names_path) \
+                and os.path.getmtime(self._values_path) >= os.path.getmtime(self._csv_path):
+            return
+
+        names, values = [], array("f")
+        with open(self._csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                names.append(row["name"])
+                values.extend(float(row[nutrient] or 0) for nutrient in FOOD_LOG_NUTRIENTS)
+
+        os.makedirs(os.path.dirname(self._values_path), exist_ok=True)
+        _write_atomically(self._names_path, "\n".join(names).encode("utf-8"))
+        _write_atomically(self._values_path, values.tobytes())
+
+    def search(self, query: str, limit: int = FOOD_SEARCH_LIMIT) -> list[int]:
+        """
+        Ids of the best matches: names with a word starting with the query first,
+        then names sharing most of the query's trigrams (typos, partial words).
+        """
+        query = _normalize(query)
+        if not query:
+            return []
+
+        matches = []
+        start = bisect_left(self._prefixes, (query,))
+        for key, food_id in islice(self._prefixes, start, None):
+            if not key.startswith(query) or len(matches) >= limit:
+                break
+            if food_id not in matches:
+                matches.append(food_id)
+
+        if len(matches) < limit and len(query) >= 3:
+            grams = _trigrams(query)
+            scores = Counter(food_id for gram in grams for food_id in self._trigram_index.get(gram, ()))
+            threshold = max(2, math.ceil(len(grams) * 0.6))
+            for food_id, score in scores.most_common():
+                if score < threshold or len(matches) >= limit:
+                    break
+                if food_id not in matches:
+                    matches.append(food_id)
+
+        return matches
+
+    def name(self, food_id: int) -> str:
+        return self._names[food_id]
+
+    def nutrients(self, food_id: int, grams: float = 100.0) -> dict:
+        """Nutrients for a portion of the given weight."""
+        width = len(FOOD_LOG_NUTRIENTS)
+        row = self._values[food_id * width:(food_id + 1) * width]
+        return {nutrient: round(value * grams / 100, 2) for nutrient, value in zip(FOOD_LOG_NUTRIENTS, row)}
+
+
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_food_db() -> FoodDatabase:
+    """Process-wide food database, loaded on first search."""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = FoodDatabase(FOOD_DB_FILE, CACHE_DIR)
+    return _db
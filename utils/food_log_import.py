@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+import math
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import date
+
+from utils import api_client, food_log_store
+from utils.batch import submit
+from utils.constants import FOOD_LOG_URL, LOG_DATE, FOOD_LOG_NUTRIENTS, CustomError, \
+    IMPORT_MAX_IN_FLIGHT, IMPORT_MAX_RETRIES, IMPORT_CHUNK_SIZE, HTTP_RETRY_BACKOFF, HTTP_RETRY_STATUSES, \
+    FOOD_LOG_SYNC_BATCH, IDEMPOTENCY_HEADER
+from utils.helper import validate_food_log
+from utils.json_stream import iter_json_items
+from utils.lazy import lazy_import
+
+requests = lazy_import("requests")
+
+IMPORTED = "Imported"
+INVALID = "Invalid"
+FAILED = "Failed"
+
+
+def read_upload(upload):
+    """
+    Stream (row_number, row) pairs out of an uploaded CSV, JSON array or JSON Lines
+    file without decoding the whole file at once. Row numbers start at 1.
+    JSON Lines rows come out as unparsed lines, so a malformed one only fails its own row.
+    """
+    name = upload.name.lower()
+    if name.endswith(".csv"):
+        rows = csv.DictReader(io.TextIOWrapper(upload, encoding="utf-8-sig", newline=""))
+    elif name.endswith(".jsonl"):
+        lines = io.TextIOWrapper(upload, encoding="utf-8-sig")
+        rows = (line for line in lines if line.strip())
+    else:
+        chunks = codecs.iterdecode(iter(lambda: upload.read(IMPORT_CHUNK_SIZE), b""), "utf-8-sig")
+        # Accept a bare list as well as the {"data": [...]} shape the backend itself returns
+        rows = iter_json_items(chunks, key="data")
+    return enumerate(rows, start=1)
+
+
+def parse_row(row: dict, user_id: str) -> dict:
+    """
+    Map an uploaded row onto the payload the Log Food form sends.
+    Missing nutrients count as 0; malformed values raise ValueError.
+    """
+    if isinstance(row, str):
+        row = json.loads(row)
+    if not isinstance(row, dict):
+        raise ValueError("expected an object with food log fields")
+
+    log_date = row.get(LOG_DATE) or date.today().isoformat()
+    nutrients = {}
+    for nutrient in FOOD_LOG_NUTRIENTS:
+        value = row.get(nutrient)
+        nutrients[nutrient] = 0.0 if value in (None, "") else float(value)
+        # float() also accepts "nan" and "inf", which slip past every comparison below
+        if not math.isfinite(nutrients[nutrient]):
+            raise ValueError(f"{nutrient} must be a finite number")
+        if nutrients[nutrient] < 0:
+            raise ValueError(f"{nutrient} must not be negative")
+
+    return {
+        "log_date": str(date.fromisoformat(str(log_date)[:10])),
+        "food": str(row.get("food") or ""),
+        "meal_type": str(row.get("meal_type") or "").strip().capitalize(),
+        "user_id": user_id,
+        **nutrients,
+    }
+
+
+def post_food_log(payload: dict, headers: dict) -> requests.Response:
+    """
+    POST one log, retrying with backoff when the request never reached the backend
+    or the backend asked us to come back later. Every attempt carries the same idempotency
+    key, so a retry of a request the backend did receive can't create the log twice.
+    """
+    headers = {**headers, IDEMPOTENCY_HEADER: str(uuid.uuid4())}
+    for attempt in range(IMPORT_MAX_RETRIES + 1):
+        last_attempt = attempt == IMPORT_MAX_RETRIES
+        try:
+            response = api_client.post(FOOD_LOG_URL, json=payload, headers=headers)
+            if response.status_code not in (429, *HTTP_RETRY_STATUSES) or last_attempt:
+                return response
+        except requests.exceptions.ConnectionError:
+            if last_attempt:
+                raise
+        time.sleep(HTTP_RETRY_BACKOFF * 2 ** attempt)
+
+
+def _result(number: int, row, status: str, detail: str = "") -> dict:
+    food = row.get("food", "") if isinstance(row, dict) else ""
+    return {"row": number, "food": food, "status": status, "detail": detail}
+
+
+def run_import(rows, user_id: str, headers: dict, on_progress=None) -> list[dict]:
+    """
+    Validate and submit rows with at most IMPORT_MAX_IN_FLIGHT requests outstanding,
+    so huge files never sit in memory as payloads. Must run on the script thread when
+    on_progress touches Streamlit; it is called with the number of rows processed so far.
+    Returns one result dict per row.
+    """
+    results, created, in_flight = [], [], {}
+    missing_echo = False
+
+    def collect(done):
+        nonlocal missing_echo
+        for future in done:
+            number, payload = in_flight.pop(future)
+            try:
+                response = future.result()
+            except requests.exceptions.RequestException as e:
+                results.append(_result(number, payload, FAILED, str(e)))
+                continue
+
+            if response.status_code != 201:
+                results.append(_result(number, payload, FAILED, f"HTTP {response.status_code}: {response.text[:200]}"))
+                continue
+
+            results.append(_result(number, payload, IMPORTED))
+            try:
+                log = response.json()
+            except ValueError:
+                log = None
+            if isinstance(log, dict) and "id" in log:
+                created.append(log)
+            else:
+                missing_echo = True
+
+        if on_progress is not None:
+            on_progress(len(results))
+
+    rows, number = iter(rows), 0
+    try:
+        while True:
+            try:
+                number, row = next(rows)
+            except StopIteration:
+                break
+            except (ValueError, csv.Error) as e:
+                # The file itself is broken from here on; report the rows read up to this point
+                results.append(_result(number + 1, None, INVALID, f"{CustomError.E0029} {e}"))
+                break
+
+            try:
+                payload = parse_row(row, user_id)
+                errors = validate_food_log(payload)
+            except ValueError as e:
+                payload, errors = row, [f"{CustomError.E0026} {e}"]
+
+            if errors:
+                results.append(_result(number, payload, INVALID, " ".join(str(error) for error in errors)))
+                continue
+
+            in_flight[submit(post_food_log, payload, headers)] = (number, payload)
+            if len(in_flight) >= IMPORT_MAX_IN_FLIGHT:
+                collect(wait(in_flight, return_when=FIRST_COMPLETED).done)
+            if len(created) >= FOOD_LOG_SYNC_BATCH:
+                food_log_store.add_logs(user_id, created)
+                created.clear()
+    finally:
+        # Whatever stopped the loop, account for the rows already sent and mirror the logs they created
+        collect(wait(in_flight).done)
+        food_log_store.add_logs(user_id, created)
+        if missing_echo:
+            # Some logs can't be mirrored locally, so let the next page load sync them
+            food_log_store.mark_stale(user_id)
+
+    results.sort(key=lambda result: result["row"])
+    return results
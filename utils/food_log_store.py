@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import codecs
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+from utils import api_client, data_cache
+from utils.constants import FOOD_LOG_URL, LOG_DATE, FOOD_LOG_NUTRIENTS, CACHE_DIR, FOOD_LOG_DB, \
+    FOOD_LOG_SYNC_INTERVAL, FOOD_LOG_FULL_SYNC_INTERVAL, FOOD_LOG_SYNC_BATCH, FOOD_LOG_SYNC_WORKERS, \
+    FOOD_LOG_SINCE_PARAM, FOOD_LOG_SYNC_SKEW, FOOD_LOG_STREAM_CHUNK_SIZE, FOOD_LOG_LATEST_URL, FOOD_LOG_DELTA_DAYS, \
+    FOOD_LOG_SYNC_MAX_PAGES
+from utils.json_stream import iter_json_items
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+requests = lazy_import("requests")
+
+logger = logging.getLogger(__name__)
+
+# Local SQLite mirror of each user's food logs. Pages read from here; between full syncs the backend is
+# only asked for what changed since the last sync, or for the recent logs; app-made creates and deletes
+# apply locally at once.
+# Triggers keep a per-day, per-meal-type rollup of the logs current, so summaries never rescan them.
+
+FOOD_LOG_COLUMNS = ["id", LOG_DATE, "meal_type", "food", *FOOD_LOG_NUTRIENTS]
+
+_ROLLUP_INPUTS = [LOG_DATE, "meal_type", *FOOD_LOG_NUTRIENTS]
+_ROLLUP_ADD = f"""
+    INSERT INTO daily_rollup (user_id, day, meal_type, logs, {", ".join(FOOD_LOG_NUTRIENTS)})
+    VALUES (NEW.user_id, substr(NEW.{LOG_DATE}, 1, 10), COALESCE(NEW.meal_type, ''), 1,
+            {", ".join(f"COALESCE(NEW.{nutrient}, 0)" for nutrient in FOOD_LOG_NUTRIENTS)})
+    ON CONFLICT (user_id, day, meal_type) DO UPDATE SET logs = logs + 1,
+        {", ".join(f"{nutrient} = {nutrient} + excluded.{nutrient}" for nutrient in FOOD_LOG_NUTRIENTS)};"""
+_ROLLUP_REMOVE = f"""
+    UPDATE daily_rollup SET logs = logs - 1,
+        {", ".join(f"{nutrient} = {nutrient} - COALESCE(OLD.{nutrient}, 0)" for nutrient in FOOD_LOG_NUTRIENTS)}
+    WHERE user_id = OLD.user_id AND day = substr(OLD.{LOG_DATE}, 1, 10) AND meal_type = COALESCE(OLD.meal_type, '');
+    DELETE FROM daily_rollup
+    WHERE user_id = OLD.user_id AND day = substr(OLD.{LOG_DATE}, 1, 10) AND meal_type = COALESCE(OLD.meal_type, '')
+        AND logs <= 0;"""
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS food_logs (
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    {LOG_DATE} TEXT NOT NULL,
+    meal_type TEXT,
+    food TEXT,
+    {", ".join(f"{nutrient} REAL" for nutrient in FOOD_LOG_NUTRIENTS)},
+    generation INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, id)
+);
+CREATE INDEX IF NOT EXISTS food_logs_by_date ON food_logs (user_id, {LOG_DATE});
+CREATE TABLE IF NOT EXISTS sync_state (
+    user_id TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL NOT NULL DEFAULT 0,
+    full_synced_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    user_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    meal_type TEXT NOT NULL,
+    logs INTEGER NOT NULL,
+    {", ".join(f"{nutrient} REAL NOT NULL" for nutrient in FOOD_LOG_NUTRIENTS)},
+    PRIMARY KEY (user_id, day, meal_type)
+);
+CREATE TRIGGER IF NOT EXISTS daily_rollup_add AFTER INSERT ON food_logs BEGIN
+    {_ROLLUP_ADD}
+END;
+CREATE TRIGGER IF NOT EXISTS daily_rollup_remove AFTER DELETE ON food_logs BEGIN
+    {_ROLLUP_REMOVE}
+END;
+CREATE TRIGGER IF NOT EXISTS daily_rollup_update AFTER UPDATE OF {", ".join(_ROLLUP_INPUTS)} ON food_logs BEGIN
+    {_ROLLUP_REMOVE}
+    {_ROLLUP_ADD}
+END;
+"""
+
+# Bump when the rollup's definition changes so existing databases rebuild it on open
+_ROLLUP_SCHEMA_VERSION = 1
+ROLLUP_COLUMNS = ["day", "meal_type", "logs", *FOOD_LOG_NUTRIENTS]
+
+# Column types of every log and rollup frame handed to pages: float32 nutrients and dictionary-encoded
+# meal types and foods (each distinct name stored once), next to datetime64 dates
+LOG_DTYPES = {**{nutrient: "float32" for nutrient in FOOD_LOG_NUTRIENTS}, "meal_type": "category", "food": "category",
+              "logs": "int32"}
+
+# Rows the backend sends again unchanged are left alone, so no rollup trigger fires for them
+_UPSERT = (
+    f"INSERT INTO food_logs (user_id, generation, {', '.join(FOOD_LOG_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(FOOD_LOG_COLUMNS) + 2))}) "
+    f"ON CONFLICT (user_id, id) DO UPDATE SET "
+    f"{', '.join(f'{col} = excluded.{col}' for col in ['generation', *FOOD_LOG_COLUMNS[1:]])} "
+    f"WHERE {' OR '.join(f'{col} IS NOT excluded.{col}' for col in FOOD_LOG_COLUMNS[1:])}"
+)
+# ...apart from the generation, which a full sync needs to tell them from rows the backend dropped
+_MARK_SEEN = "UPDATE food_logs SET generation = ? WHERE user_id = ? AND id = ? AND generation < ?"
+
+_lock = threading.RLock()
+_conn = None
+_pool = ThreadPoolExecutor(max_workers=FOOD_LOG_SYNC_WORKERS, thread_name_prefix="food-log-sync")
+_inflight: dict[str, Future] = {}
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    with _lock:
+        if _conn is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(CACHE_DIR, FOOD_LOG_DB), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < _ROLLUP_SCHEMA_VERSION:
+                with conn:
+                    _rebuild_rollup(conn)
+                    conn.execute(f"PRAGMA user_version = {_ROLLUP_SCHEMA_VERSION}")
+            _conn = conn
+        return _conn
+
+
+def _rebuild_rollup(conn: sqlite3.Connection, user_id: str | None = None):
+    """Recompute the rollup from the logs, for one user or everyone."""
+    where, params = ("WHERE user_id = ?", [user_id]) if user_id is not None else ("", [])
+    conn.execute(f"DELETE FROM daily_rollup {where}", params)
+    conn.execute(
+        f"INSERT INTO daily_rollup (user_id, day, meal_type, logs, {', '.join(FOOD_LOG_NUTRIENTS)}) "
+        f"SELECT user_id, substr({LOG_DATE}, 1, 10), COALESCE(meal_type, ''), COUNT(*), "
+        f"{', '.join(f'TOTAL({nutrient})' for nutrient in FOOD_LOG_NUTRIENTS)} "
+        f"FROM food_logs {where} GROUP BY 1, 2, 3",
+        params,
+    )
+
+
+def _state(user_id: str) -> dict:
+    with _lock, _connection() as conn:
+        conn.execute("INSERT OR IGNORE INTO sync_state (user_id) VALUES (?)", (user_id,))
+        generation, version, synced_at, full_synced_at = conn.execute(
+            "SELECT generation, version, synced_at, full_synced_at FROM sync_state WHERE user_id = ?", (user_id,)
+        ).fetchone()
+    return {"generation": generation, "version": version, "synced_at": synced_at, "full_synced_at": full_synced_at}
+
+
+def _write_rows(user_id: str, rows: list[dict], generation: int):
+    values = [
+        (user_id, generation, str(row["id"]), *(row.get(col) for col in FOOD_LOG_COLUMNS[1:]))
+        for row in rows if "id" in row
+    ]
+    with _lock, _connection() as conn:
+        changed = conn.executemany(_UPSERT, values).rowcount
+        conn.executemany(_MARK_SEEN, [(generation, user_id, value[2], generation) for value in values])
+        if changed > 0:
+            conn.execute("UPDATE sync_state SET version = version + 1 WHERE user_id = ?", (user_id,))
+
+
+def _iter_batches(response: requests.Response, members: dict):
+    """
+    Yield the rows of a food log response ({"data": [...]} or a bare list) in batches of at most
+    FOOD_LOG_SYNC_BATCH. The body is parsed as it streams in, so even a huge response never has
+    more than one batch and one read chunk in memory. The object's other members go into ``members``.
+    """
+    response.raise_for_status()
+    chunks = codecs.iterdecode(response.iter_content(chunk_size=FOOD_LOG_STREAM_CHUNK_SIZE), "utf-8")
+    rows = []
+    for row in iter_json_items(chunks, key="data", members=members):
+        rows.append(row)
+        if len(rows) == FOOD_LOG_SYNC_BATCH:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+def _iter_remote_pages(headers: dict, params: dict):
+    """
+    Yield the backend's food logs one batch at a time, page by page.
+    Returns False if it had to give up before the last page.
+    """
+    skip, seen = 0, set()
+    for _ in range(FOOD_LOG_SYNC_MAX_PAGES):
+        received, new, body = 0, 0, {}
+        with api_client.get(
+            FOOD_LOG_URL, params={**params, "skip": skip, "limit": FOOD_LOG_SYNC_BATCH}, headers=headers, stream=True
+        ) as response:
+            for rows in _iter_batches(response, body):
+                received += len(rows)
+                before = len(seen)
+                seen.update(str(row["id"]) for row in rows if "id" in row)
+                new += len(seen) - before
+                yield rows
+
+        skip += received
+        # An empty page, or only logs already received: a backend that ignores skip would repeat itself forever
+        if new == 0:
+            return True
+        if "count" in body:
+            # Backends may cap the page size below the limit asked for, so trust the total instead
+            if skip >= body["count"]:
+                return True
+        # Without a total, a short page is the last one, or a backend that ignored skip/limit
+        elif received != FOOD_LOG_SYNC_BATCH:
+            return True
+
+    logger.warning("Gave up syncing food logs after %d pages", FOOD_LOG_SYNC_MAX_PAGES)
+    return False
+
+
+def _iter_recent(headers: dict):
+    """Yield the logs of the last FOOD_LOG_DELTA_DAYS days one batch at a time."""
+    with api_client.get(FOOD_LOG_LATEST_URL, params={"days": FOOD_LOG_DELTA_DAYS}, headers=headers,
+                        stream=True) as response:
+        yield from _iter_batches(response, {})
+    return True
+
+
+def sync(user_id: str, headers: dict, full: bool = False):
+    """
+    Bring the local copy up to date. A delta sync upserts whatever changed since the last sync,
+    or, unless the backend can filter by update time, whatever was logged in the last
+    FOOD_LOG_DELTA_DAYS; a full sync also removes rows that no longer exist on the backend.
+    Raises requests.HTTPError when the backend refuses the request.
+    """
+    state = _state(user_id)
+    started_at = time.time()
+    since = max(state["synced_at"] - FOOD_LOG_SYNC_SKEW, 0)
+    # The recent window can't cover changes made before it started
+    window_missed = not FOOD_LOG_SINCE_PARAM and started_at - since > FOOD_LOG_DELTA_DAYS * 24 * 60 * 60
+    full = full or window_missed or started_at - state["full_synced_at"] > FOOD_LOG_FULL_SYNC_INTERVAL
+
+    generation = state["generation"]
+    if full:
+        # Bump the generation up front so logs added locally during the sync survive its cleanup
+        generation += 1
+        with _lock, _connection() as conn:
+            conn.execute("UPDATE sync_state SET generation = ? WHERE user_id = ?", (generation, user_id))
+        batches = _iter_remote_pages(headers, {})
+    elif FOOD_LOG_SINCE_PARAM:
+        params = {FOOD_LOG_SINCE_PARAM: datetime.fromtimestamp(since, tz=timezone.utc).isoformat()}
+        batches = _iter_remote_pages(headers, params)
+    else:
+        batches = _iter_recent(headers)
+
+    while True:
+        try:
+            rows = next(batches)
+        except StopIteration as done:
+            complete = done.value
+            break
+        _write_rows(user_id, rows, generation)
+
+    with _lock, _connection() as conn:
+        if full:
+            # After an incomplete sync, rows not seen again may well still exist on the backend
+            removed = conn.execute(
+                "DELETE FROM food_logs WHERE user_id = ? AND generation < ?", (user_id, generation)
+            ).rowcount if complete else 0
+            # Drop any floating-point drift the incremental updates accumulated
+            _rebuild_rollup(conn, user_id)
+            conn.execute("UPDATE sync_state SET full_synced_at = ? WHERE user_id = ?", (started_at, user_id))
+            if removed > 0:
+                conn.execute("UPDATE sync_state SET version = version + 1 WHERE user_id = ?", (user_id,))
+        conn.execute("UPDATE sync_state SET synced_at = ? WHERE user_id = ?", (started_at, user_id))
+
+
+def _sync_in_background(user_id: str, headers: dict) -> Future:
+    """Start a sync for the user unless one is already running."""
+    with _lock:
+        future = _inflight.get(user_id)
+        if future is None or future.done():
+            future = _pool.submit(sync, user_id, headers)
+            _inflight[user_id] = future
+            future.add_done_callback(lambda _: _inflight.pop(user_id, None))
+        return future
+
+
+def refresh(user_id: str, headers: dict, wait: bool = True):
+    """
+    Make sure the user's logs can be read locally. The first load waits for a sync unless
+    ``wait`` is False; afterwards stale data is served while a delta sync runs in the background.
+    """
+    state = _state(user_id)
+    if state["full_synced_at"] == 0:
+        future = _sync_in_background(user_id, headers)
+        if wait:
+            future.result()
+    elif time.time() - state["synced_at"] > FOOD_LOG_SYNC_INTERVAL:
+        _sync_in_background(user_id, headers)
+
+
+def has_synced(user_id: str) -> bool:
+    """Whether the user's logs have been fully synced at least once, i.e. can be read locally."""
+    return _state(user_id)["full_synced_at"] > 0
+
+
+def mark_stale(user_id: str):
+    """Force the next refresh to sync, e.g. when a write's result could not be applied locally."""
+    with _lock, _connection() as conn:
+        conn.execute("UPDATE sync_state SET synced_at = 0 WHERE user_id = ?", (user_id,))
+
+
+def data_version(user_id: str) -> int:
+    """Counter bumped on every local change; use it to key anything derived from the logs."""
+    return _state(user_id)["version"]
+
+
+def add_logs(user_id: str, rows: list[dict]):
+    """Apply logs just created on the backend."""
+    _write_rows(user_id, rows, _state(user_id)["generation"])
+
+
+def get_logs(user_id: str, log_ids: list) -> list[dict]:
+    """Stored rows for the given ids, e.g. to restore them if a delete fails."""
+    placeholders = ", ".join("?" * len(log_ids))
+    with _lock:
+        cursor = _connection().execute(
+            f"SELECT {', '.join(FOOD_LOG_COLUMNS)} FROM food_logs WHERE user_id = ? AND id IN ({placeholders})",
+            [user_id, *(str(log_id) for log_id in log_ids)],
+        )
+        return [dict(zip(FOOD_LOG_COLUMNS, row)) for row in cursor.fetchall()]
+
+
+def apply_created(user_id: str, response: requests.Response):
+    """Apply the backend's answer to a create; resync later if it didn't echo the new log."""
+    try:
+        created = response.json()
+    except ValueError:
+        created = None
+
+    if isinstance(created, dict) and "id" in created:
+        add_logs(user_id, [created])
+    else:
+        mark_stale(user_id)
+
+
+def remove_logs(user_id: str, log_ids: list):
+    """Apply logs just deleted on the backend."""
+    with _lock, _connection() as conn:
+        conn.executemany("DELETE FROM food_logs WHERE user_id = ? AND id = ?",
+                         [(user_id, str(log_id)) for log_id in log_ids])
+        conn.execute("UPDATE sync_state SET version = version + 1 WHERE user_id = ?", (user_id,))
+
+
+def forget_user(user_id: str):
+    """Drop everything stored for the user."""
+    with _lock, _connection() as conn:
+        conn.execute("DELETE FROM food_logs WHERE user_id = ?", (user_id,))
+        conn.execute("DELETE FROM sync_state WHERE user_id = ?", (user_id,))
+    data_cache.forget_user(user_id)
+
+
+def _where(user_id: str, start_date: date | None, end_date: date | None) -> tuple[str, list]:
+    clauses, params = ["user_id = ?"], [user_id]
+    if start_date is not None:
+        clauses.append(f"{LOG_DATE} >= ?")
+        params.append(start_date.isoformat())
+    if end_date is not None:
+        # end_date is inclusive, so compare against the start of the following day
+        clauses.append(f"{LOG_DATE} < ?")
+        params.append((end_date + timedelta(days=1)).isoformat())
+    return " AND ".join(clauses), params
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """ISO dates or timestamps, with or without an offset, as naive UTC datetime64."""
+    return pd.to_datetime(values, format="ISO8601", utc=True).dt.tz_localize(None)
+
+
+def typed_frame(frame: pd.DataFrame, date_column: str = LOG_DATE) -> pd.DataFrame:
+    """Convert the columns SQLite hands back as float64 and Python objects to LOG_DTYPES."""
+    frame = frame.astype({column: dtype for column, dtype in LOG_DTYPES.items() if column in frame.columns})
+    if date_column in frame.columns:
+        frame[date_column] = parse_dates(frame[date_column])
+    return frame
+
+
+def query_logs(user_id: str, start_date: date | None = None, end_date: date | None = None,
+               offset: int = 0, limit: int | None = None) -> pd.DataFrame:
+    """User's logs between the given dates (inclusive), newest first, typed as LOG_DTYPES."""
+    where, params = _where(user_id, start_date, end_date)
+    sql = f"SELECT {', '.join(FOOD_LOG_COLUMNS)} FROM food_logs WHERE {where} ORDER BY {LOG_DATE} DESC"
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    with _lock:
+        frame = pd.read_sql_query(sql, _connection(), params=params)
+    return typed_frame(frame)
+
+
+def count_logs(user_id: str, start_date: date | None = None, end_date: date | None = None) -> int:
+    where, params = _where(user_id, start_date, end_date)
+    with _lock:
+        return _connection().execute(f"SELECT COUNT(*) FROM food_logs WHERE {where}", params).fetchone()[0]
+
+
+def daily_rollup(user_id: str) -> pd.DataFrame:
+    """
+    One row per day and meal type with the number of logs and their summed nutrients,
+    oldest day first, typed as LOG_DTYPES. Read once per data version; slice it for any date window.
+    """
+    def read():
+        with _lock:
+            rollup = pd.read_sql_query(
+                f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM daily_rollup WHERE user_id = ? ORDER BY day",
+                _connection(), params=[user_id],
+            )
+        return typed_frame(rollup, date_column="day")
+
+    return data_cache.get_or_build(user_id, "daily_rollup", read, version=data_version(user_id))
@@ -1,4 +1,26 @@
-from utils.constants import DISPLAY_NAME_MAP
+from __future__ import annotations
+
+import hashlib
+
+from utils.cache import LRUCache
+from utils.constants import DISPLAY_NAME_MAP, CustomError, MEAL_TYPES, TABLE_CACHE_SIZE, TABLE_CACHE_MAX_BYTES
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Rendered intake tables keyed by the content hash of their data
+_table_cache = LRUCache(maxsize=TABLE_CACHE_SIZE, max_bytes=TABLE_CACHE_MAX_BYTES)
+
+INTAKE_TABLE_CSS = """
+<style>
+.intake-table td { font-size: 16px; }
+.intake-table th { font-size: 18px; }
+.intake-table .met-low { background-color: #f08080; }
+.intake-table .met-mid { background-color: #fffacd; }
+.intake-table .met-ok { background-color: #90ee90; }
+</style>
+"""
 
 
 def get_bmi_color(bmi_class: str) -> str:
@@ -13,16 +35,79 @@ def get_bmi_color(bmi_class: str) -> str:
     }.get(bmi_class, "#9E9E9E")     # Grey fallback
 
 
-def prepare_view(row: dict) -> str:
+def calculate_bmi(height_cm: float, weight_kg: float) -> float:
+    """
+    Function to calculate BMI from height (cm) and weight (kg)
+    """
+    height_m = height_cm / 100
+    return round(weight_kg / (height_m * height_m), 2)
+
+
+def validate_food_log(payload: dict) -> list:
+    """
+    Function to check a food log payload; returns the list of problems found
+    """
+    errors = []
+    if not str(payload.get("food") or "").strip():
+        errors.append(CustomError.E0022)
+    if payload.get("meal_type") not in MEAL_TYPES:
+        errors.append(CustomError.E0027)
+    if payload.get("calories", 0) <= 0:
+        errors.append(CustomError.E0023)
+    return errors
+
+
+def prepare_views(df: pd.DataFrame) -> pd.Series:
+    """
+    Function to build the Food Log Details markup of every row,
+    one vectorized string operation per column instead of per cell
+    """
+    view = pd.Series('<div style="font-size:16px">', index=df.index)
+    for col in df.columns:
+        view = view + f'<br><b>{DISPLAY_NAME_MAP.get(col, col)}:</b> ' + df[col].astype(str)
+
+    return view + "</div>"
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Function to hash a frame's content: values, index, column names and dtypes
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(repr(list(zip(df.columns, map(str, df.dtypes)))).encode())
+    return digest.hexdigest()
+
+
+def _escape(values: pd.Series) -> pd.Series:
+    return values.astype(str).str.replace("&", "&amp;").str.replace("<", "&lt;").str.replace(">", "&gt;")
+
+
+def _format_number(values: pd.Series) -> pd.Series:
+    return pd.Series(np.char.mod("%.2f", values.to_numpy(dtype=float)), index=values.index)
+
+
+def render_intake_table(df: pd.DataFrame, met_column: str = "% Met") -> str:
     """
-    Function to display Food Log Details
+    Function to render the nutrient intake table as class-based HTML, colouring the
+    met_column red (< 70), yellow (< 100) or green; cached by the frame's content and met_column
     """
-    view = f'<div style="font-size:16px">'
-    for k, v in row.items():
-        row_view = f'<br><b>{DISPLAY_NAME_MAP.get(k, k)}:</b> {v}'
-        view += row_view
+    key = (frame_fingerprint(df), met_column)
+    markup = _table_cache.get(key)
+    if markup is not None:
+        return markup
 
-    view += "</div>"
+    met = df[met_column].to_numpy(dtype=float)
+    met_class = pd.Series(np.select([met < 70, met < 100], ["met-low", "met-mid"], "met-ok"), index=df.index)
 
-    return view
+    rows = "<tr><th>" + _escape(pd.Series(df.index, index=df.index)) + "</th>"
+    for col in df.columns:
+        cells = _format_number(df[col]) if pd.api.types.is_numeric_dtype(df[col]) else _escape(df[col])
+        cell_class = '<td class="' + met_class + '">' if col == met_column else "<td>"
+        rows = rows + cell_class + cells + "</td>"
 
+    header = "".join(f"<th>{col}</th>" for col in ["", *_escape(pd.Series(df.columns))])
+    markup = (f'<table class="intake-table"><thead><tr>{header}</tr></thead>'
+              f'<tbody>{(rows + "</tr>").str.cat()}</tbody></table>')
+    _table_cache.set(key, markup)
+    return markup
@@ -0,0 +1,157 @@
+import csv
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from urllib.parse import urlsplit
+
+from utils.constants import BACKEND_URL, HTTP_TELEMETRY_ENABLED, HTTP_TELEMETRY_WINDOW, HTTP_TELEMETRY_MAX_SAMPLES, \
+    HTTP_TELEMETRY_DUMP_INTERVAL, HTTP_TELEMETRY_DIR
+from utils.metrics import HistogramSet, registry
+
+# Rolling per-endpoint record of backend calls: latency, response size, status and urllib3 retries.
+# Ids in paths collapse into "{id}", so every DELETE /food-log/<uuid> lands in one series.
+# A background thread dumps the summary to JSON and CSV; the latencies also feed the Prometheus export.
+
+ERROR = "error"  # status recorded when no response arrived at all
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$")
+_API_PREFIX = urlsplit(BACKEND_URL).path.rstrip("/")
+
+SUMMARY_FIELDS = ["method", "endpoint", "requests", "errors", "error_rate", "retries",
+                  "p50_ms", "p95_ms", "p99_ms", "mean_bytes", "total_bytes", "statuses"]
+
+logger = logging.getLogger(__name__)
+
+latencies = HistogramSet("nutriapp_http_request_seconds", "Backend call latency, retries included.",
+                         ("method", "endpoint", "status"))
+registry.append(latencies)
+
+_lock = threading.Lock()
+_samples: dict[tuple[str, str], deque] = {}  # (method, endpoint) -> (time, seconds, bytes, status, retries)
+_dumper = None
+
+
+def endpoint_name(url: str) -> str:
+    """Path below the API root with every id segment replaced by {id}, e.g. /food-log/{id}."""
+    path = urlsplit(url).path
+    if path.startswith(_API_PREFIX):
+        path = path[len(_API_PREFIX):]
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/")) or "/"
+
+
+def record(method: str, url: str, seconds: float, status, size: int | None = None, retries: int = 0):
+    """Add one call; status is the HTTP status code, or ERROR when the request failed without one."""
+    if not HTTP_TELEMETRY_ENABLED:
+        return
+
+    key = (method.upper(), endpoint_name(url))
+    now = time.time()
+    with _lock:
+        samples = _samples.get(key)
+        if samples is None:
+            samples = _samples[key] = deque(maxlen=HTTP_TELEMETRY_MAX_SAMPLES)
+        samples.append((now, seconds, size, status, retries))
+        _prune(samples, now)
+    latencies.observe((*key, str(status)), seconds)
+    _ensure_dumper()
+
+
+def record_response(method: str, url: str, seconds: float, response, streamed: bool = False):
+    # A streamed body hasn't been read yet, so fall back to the size the server announced
+    if streamed:
+        size = response.headers.get("Content-Length")
+        size = int(size) if size and size.isdigit() else None
+    else:
+        size = len(response.content)
+    retry_state = getattr(response.raw, "retries", None)
+    retries = len(retry_state.history) if retry_state is not None else 0
+    record(method, url, seconds, response.status_code, size, retries)
+
+
+def _prune(samples: deque, now: float):
+    while samples and samples[0][0] < now - HTTP_TELEMETRY_WINDOW:
+        samples.popleft()
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def summary() -> list[dict]:
+    """One row per endpoint over the rolling window, slowest p95 first."""
+    now = time.time()
+    with _lock:
+        snapshot = {}
+        for key, samples in _samples.items():
+            _prune(samples, now)
+            if samples:
+                snapshot[key] = list(samples)
+
+    rows = []
+    for (method, endpoint), samples in snapshot.items():
+        seconds = sorted(sample[1] for sample in samples)
+        sizes = [sample[2] for sample in samples if sample[2] is not None]
+        statuses = Counter(str(sample[3]) for sample in samples)
+        errors = sum(1 for sample in samples if sample[3] == ERROR or sample[3] >= 500)
+        rows.append({
+            "method": method,
+            "endpoint": endpoint,
+            "requests": len(samples),
+            "errors": errors,
+            "error_rate": round(errors / len(samples), 4),
+            "retries": sum(sample[4] for sample in samples),
+            "p50_ms": round(_percentile(seconds, 0.50) * 1000, 1),
+            "p95_ms": round(_percentile(seconds, 0.95) * 1000, 1),
+            "p99_ms": round(_percentile(seconds, 0.99) * 1000, 1),
+            "mean_bytes": round(sum(sizes) / len(sizes)) if sizes else None,
+            "total_bytes": sum(sizes),
+            "statuses": dict(sorted(statuses.items())),
+        })
+    return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+
+def _write_atomically(path: str, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", newline="") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def dump(directory: str = HTTP_TELEMETRY_DIR):
+    """Write the current summary to http_telemetry.json and http_telemetry.csv."""
+    rows = summary()
+    os.makedirs(directory, exist_ok=True)
+    _write_atomically(
+        os.path.join(directory, "http_telemetry.json"),
+        lambda f: json.dump({"generated_at": time.time(), "window_s": HTTP_TELEMETRY_WINDOW, "endpoints": rows},
+                            f, indent=2),
+    )
+
+    def write_csv(f):
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, "statuses": ";".join(f"{s}:{n}" for s, n in row["statuses"].items())})
+    _write_atomically(os.path.join(directory, "http_telemetry.csv"), write_csv)
+
+
+def _dump_loop():
+    while True:
+        time.sleep(HTTP_TELEMETRY_DUMP_INTERVAL)
+        try:
+            dump()
+        except OSError:
+            logger.exception("Dumping HTTP telemetry failed")
+
+
+def _ensure_dumper():
+    global _dumper
+    if _dumper is None:
+        with _lock:
+            if _dumper is None:
+                _dumper = threading.Thread(target=_dump_loop, name="http-telemetry-dump", daemon=True)
+                _dumper.start()
@@ -0,0 +1,113 @@
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """
+    Cursor over a stream of text chunks that only keeps the unread tail in memory
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it, "" at the end of the stream."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def take(self) -> str:
+        char = self.peek()
+        self._pos += len(char)
+        return char
+
+    def expect(self, char: str):
+        found = self.take()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found or 'end of input'}'")
+
+    def value(self):
+        """Decode one complete JSON value, reading more chunks until it is whole."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number or literal touching the end of the buffer may continue in the next chunk
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def _iter_array(reader: _Reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.take()
+        return
+
+    while True:
+        yield reader.value()
+        separator = reader.take()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' but found '{separator or 'end of input'}'")
+
+
+def iter_json_items(chunks, key: str | None = None, members: dict | None = None):
+    """
+    Yield the items of a JSON array one at a time from an iterable of text chunks.
+    The array is either the top-level value or, when ``key`` is given, that member
+    of a top-level object (e.g. the "data" list of a paged API response).
+    When ``members`` is given, the object's other members (e.g. "count") are stored
+    in it as they are read, which means reading on past the end of the array.
+    Memory use is bounded by the largest single item, not the whole document.
+    """
+    reader = _Reader(chunks)
+    if key is None or reader.peek() == "[":
+        yield from _iter_array(reader)
+        return
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key:
+            yield from _iter_array(reader)
+            if members is None:
+                return
+        elif members is not None:
+            members[name] = reader.value()
+        else:
+            reader.value()
+
+        separator = reader.take()
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or '}}' but found '{separator or 'end of input'}'")
@@ -0,0 +1,47 @@
+import importlib
+import logging
+import threading
+import types
+
+# pandas, plotly.express and requests together take about a second to import. Pages bind them
+# through lazy_import so a script run only pays for the libraries its code path actually touches.
+
+logger = logging.getLogger(__name__)
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that imports it on first attribute access
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    def __getattr__(self, attr):
+        # Only called for names not set on the stand-in itself
+        if self._module is None:
+            # The import system serialises concurrent first imports of the same module
+            self._module = importlib.import_module(self.__name__)
+        return getattr(self._module, attr)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Module proxy for ``name``; the real import happens the first time an attribute is used."""
+    return _LazyModule(name)
+
+
+def _import_all(names):
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.exception("Pre-warming %s failed", name)
+
+
+def prewarm(names):
+    """Import modules on a background thread so the next page finds them loaded."""
+    threading.Thread(target=_import_all, args=(list(names),), name="import-prewarm", daemon=True).start()
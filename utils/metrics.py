@@ -0,0 +1,186 @@
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+import streamlit as st
+
+from utils.constants import METRICS_ENABLED, METRICS_FILE, METRICS_EXPORT_INTERVAL, METRICS_DEBUG_PARAM
+
+# Process-wide latency histograms for named stages of a page run ("dashboard.fetch_food_logs", ...).
+# Every session adds to the same histograms; a background thread writes them to METRICS_FILE in the
+# Prometheus text format, ready for node_exporter's textfile collector. With METRICS_ENABLED off,
+# timed() returns the function untouched and stage() a shared no-op, so instrumentation costs nothing.
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_exporter = None
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (seconds), bucket bounds as in Prometheus
+    """
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if i == len(BUCKETS):
+                    return BUCKETS[-1]
+                lower = BUCKETS[i - 1] if i else 0.0
+                return lower + (BUCKETS[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return BUCKETS[-1]
+
+
+class HistogramSet:
+    """
+    Thread-safe histograms keyed by a tuple of label values
+    """
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._histograms: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: tuple, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def items(self) -> list[tuple[tuple, Histogram]]:
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def to_prometheus(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, histogram in self.items():
+            labels = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {histogram.total}")
+            lines.append(f"{self.name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+stages = HistogramSet("nutriapp_stage_seconds", "Time spent in each stage of a page run.", ("stage",))
+# Other modules register their own sets here to have them exported alongside the stages
+registry: list[HistogramSet] = [stages]
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        stages.observe((self.name,), time.perf_counter() - self.start)
+        _ensure_exporter()
+
+
+def stage(name: str):
+    """Context manager timing a block as the named stage."""
+    return _Stage(name) if METRICS_ENABLED else _NOOP
+
+
+def timed(name: str):
+    """Decorator timing every call of the function as the named stage."""
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def to_prometheus() -> str:
+    return "\n".join(histograms.to_prometheus() for histograms in registry)
+
+
+def write_prometheus_file(path: str = METRICS_FILE):
+    """Replace the file atomically so a scraper never reads half of it."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(to_prometheus())
+    os.replace(tmp_path, path)
+
+
+def _export_loop():
+    while True:
+        time.sleep(METRICS_EXPORT_INTERVAL)
+        try:
+            write_prometheus_file()
+        except OSError:
+            logger.exception("Writing %s failed", METRICS_FILE)
+
+
+def _ensure_exporter():
+    global _exporter
+    if _exporter is None:
+        with _lock:
+            if _exporter is None:
+                _exporter = threading.Thread(target=_export_loop, name="metrics-exporter", daemon=True)
+                _exporter.start()
+
+
+def render_debug_panel():
+    """Stage timings in the sidebar, for runs opened with ?debug=metrics while metrics are enabled."""
+    if not METRICS_ENABLED or st.query_params.get("debug") != METRICS_DEBUG_PARAM:
+        return
+
+    with st.sidebar.expander("⏱️ Stage timings", expanded=True):
+        st.caption("All sessions of this process, up to the previous run.")
+        st.dataframe([
+            {
+                "stage": name,
+                "runs": histogram.count,
+                "mean ms": round(histogram.total / histogram.count * 1000, 1),
+                "p50 ms": round(histogram.quantile(0.5) * 1000, 1),
+                "p95 ms": round(histogram.quantile(0.95) * 1000, 1),
+            }
+            for (name,), histogram in stages.items()
+        ], hide_index=True, use_container_width=True)
+        st.download_button("⬇️ Prometheus text", to_prometheus(), file_name="metrics.prom", mime="text/plain")
@@ -0,0 +1,140 @@
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from utils import api_client, food_log_store
+from utils.batch import submit
+from utils.cache import LRUCache, SQLiteStore
+from utils.constants import NUTRIENT_ANALYSIS_URL, CACHE_DIR, NUTRITION_CACHE_SIZE, NUTRITION_RECONCILE_INTERVAL, \
+    NUTRITION_MISMATCH_TOLERANCE
+from utils.lazy import lazy_import
+
+requests = lazy_import("requests")
+
+# The Nutrient Analysis page is served from the local log mirror: averages always come from the daily
+# rollup, the recommended intakes from the user's last backend summary, kept in memory and on disk.
+# The backend summary is refetched in the background and its averages are only used to cross-check
+# the local ones; nutrients where the two disagree are flagged. Backend averages are shown only
+# while the user's logs have never been synced.
+
+logger = logging.getLogger(__name__)
+
+_cache = LRUCache(maxsize=NUTRITION_CACHE_SIZE)  # user_id -> last backend summary
+_disk = SQLiteStore(os.path.join(CACHE_DIR, "nutrition.sqlite"), "summary")
+_lock = threading.Lock()
+_inflight: dict[str, Future] = {}
+
+
+def local_averages(user_id: str, nutrients) -> dict:
+    """Average daily intake of each nutrient over the days the user logged anything."""
+    rollup = food_log_store.daily_rollup(user_id)
+    days = rollup["day"].nunique()
+    columns = [nutrient for nutrient in nutrients if nutrient in rollup.columns]
+    totals = rollup[columns].sum()
+    return {nutrient: round(float(totals[nutrient]) / days, 2) if days else 0.0 for nutrient in columns}
+
+
+def _differences(backend: dict, local: dict) -> dict:
+    """nutrient -> {"backend": ..., "local": ...} for the averages that don't agree."""
+    return {
+        nutrient: {"backend": backend[nutrient], "local": value}
+        for nutrient, value in local.items()
+        if nutrient in backend
+        and not math.isclose(float(backend[nutrient]), value, rel_tol=NUTRITION_MISMATCH_TOLERANCE, abs_tol=0.01)
+    }
+
+
+def _cached_summary(user_id: str) -> dict | None:
+    summary = _cache.get(user_id)
+    if summary is None:
+        summary = _disk.get(user_id)
+        if summary is not None:
+            _cache.set(user_id, summary)
+    return summary
+
+
+def _fetch(user_id: str, headers: dict | None) -> dict | None:
+    """
+    Fetch the backend summary and remember it with the data version it describes, along with
+    how its averages differ from the local ones when both describe the same logs.
+    """
+    version = food_log_store.data_version(user_id)
+    response = api_client.get(NUTRIENT_ANALYSIS_URL, headers=headers)
+    if response.status_code != 200:
+        return None
+
+    body = response.json()
+    differences = {}
+    if food_log_store.has_synced(user_id) and food_log_store.data_version(user_id) == version:
+        differences = _differences(body["average"], local_averages(user_id, body["recommended"]))
+        if differences:
+            logger.warning("Backend and local nutrient averages differ for %s: %s", user_id, differences)
+
+    summary = {
+        "average": body["average"],
+        "recommended": body["recommended"],
+        "differences": differences,
+        "version": version,
+        "fetched_at": time.time(),
+    }
+    _cache.set(user_id, summary)
+    _disk.set(user_id, summary)
+    return summary
+
+
+def _reconcile_in_background(user_id: str, headers: dict | None):
+    """Refetch the backend summary unless a fetch for this user is already running."""
+    def run():
+        try:
+            _fetch(user_id, headers)
+        except Exception:
+            logger.exception("Refreshing the nutrition summary failed")
+
+    with _lock:
+        future = _inflight.get(user_id)
+        if future is None or future.done():
+            future = submit(run)
+            _inflight[user_id] = future
+            future.add_done_callback(lambda _: _inflight.pop(user_id, None))
+
+
+def get_nutrition_summary(user_id: str, headers: dict | None = None) -> dict | None:
+    """
+    Return {"average": {...}, "recommended": {...}, "differences": {...}} for the user, with
+    "differences" naming the nutrients whose backend average disagrees with the local one.
+    Only the first visit, with no recommended-intake table cached yet, waits for the backend
+    and for the first sync of the logs; returns None if the backend summary can't be had then.
+    """
+    summary = _cached_summary(user_id)
+    try:
+        food_log_store.refresh(user_id, headers, wait=summary is None)
+    except requests.exceptions.RequestException:
+        logger.warning("Syncing the food logs failed; analysing whatever was synced before")
+
+    if summary is None:
+        summary = _fetch(user_id, headers)
+        if summary is None:
+            return None
+    elif (summary["version"] != food_log_store.data_version(user_id)
+          or time.time() - summary["fetched_at"] > NUTRITION_RECONCILE_INTERVAL):
+        _reconcile_in_background(user_id, headers)
+
+    recommended = summary["recommended"]
+    if not food_log_store.has_synced(user_id):
+        # Nothing to compute from yet; the first sync is still running or failed
+        return {"average": summary["average"], "recommended": recommended, "differences": {}}
+
+    local = local_averages(user_id, recommended)
+    # Keep the recommended table's order: the page lines the two up by position
+    average = {nutrient: local.get(nutrient, summary["average"].get(nutrient, 0.0)) for nutrient in recommended}
+    up_to_date = summary["version"] == food_log_store.data_version(user_id)
+    differences = summary.get("differences", {}) if up_to_date else {}
+    return {"average": average, "recommended": recommended, "differences": differences}
+
+
+def forget_nutrition_summary(user_id: str):
+    _cache.pop(user_id)
+    _disk.delete(user_id)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from utils import api_client, auth, food_log_store
+from utils.batch import submit_each
+from utils.constants import FOOD_LOG_URL, CACHE_DIR, OUTBOX_DB, OUTBOX_POLL_INTERVAL, OUTBOX_BACKOFF_BASE, \
+    OUTBOX_BACKOFF_MAX, OUTBOX_FLUSH_BATCH, IDEMPOTENCY_HEADER, HTTP_RETRY_STATUSES
+from utils.lazy import lazy_import
+
+requests = lazy_import("requests")
+
+# Durable queue of food logs waiting to reach the backend. Entries survive restarts;
+# tokens do not, so a user's entries wait until they open the app again after a restart.
+# auth.check_session() hands over every token it sees, including ones refreshed in the background.
+
+PENDING = "pending"
+REJECTED = "rejected"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+_conn = None
+_tokens: dict[str, str] = {}  # user_id -> latest bearer token, memory only
+_wake = threading.Event()
+_worker = None
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    with _lock:
+        if _conn is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(CACHE_DIR, OUTBOX_DB), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _conn = conn
+        return _conn
+
+
+def _ensure_worker():
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name="outbox-worker", daemon=True)
+            _worker.start()
+
+
+def remember_token(user_id: str, token: str):
+    """Let the worker send the user's queued logs with this token. Cheap when it already has it."""
+    with _lock:
+        if _tokens.get(user_id) == token:
+            return
+        _tokens[user_id] = token
+    _ensure_worker()
+    _wake.set()
+
+
+def enqueue(user_id: str, token: str, payload: dict) -> str:
+    """
+    Persist a food log for delivery and return immediately.
+    Returns the idempotency key the backend will receive with it.
+    """
+    key = str(uuid.uuid4())
+    with _lock, _connection() as conn:
+        conn.execute(
+            "INSERT INTO outbox (idempotency_key, user_id, payload, created_at) VALUES (?, ?, ?, ?)",
+            (key, user_id, json.dumps(payload), time.time()),
+        )
+    remember_token(user_id, token)
+    _ensure_worker()
+    _wake.set()
+    return key
+
+
+def pending_count(user_id: str) -> int:
+    with _lock:
+        return _connection().execute(
+            "SELECT COUNT(*) FROM outbox WHERE user_id = ? AND status = ?", (user_id, PENDING)
+        ).fetchone()[0]
+
+
+def rejected_entries(user_id: str) -> list[dict]:
+    """Logs the backend refused outright; they are kept until the user dismisses them."""
+    with _lock:
+        rows = _connection().execute(
+            "SELECT id, payload, last_error FROM outbox WHERE user_id = ? AND status = ? ORDER BY id",
+            (user_id, REJECTED),
+        ).fetchall()
+    return [{"id": row_id, **json.loads(payload), "error": error} for row_id, payload, error in rows]
+
+
+def dismiss_rejected(user_id: str):
+    with _lock, _connection() as conn:
+        conn.execute("DELETE FROM outbox WHERE user_id = ? AND status = ?", (user_id, REJECTED))
+
+
+def forget_user(user_id: str):
+    """Drop the user's queued logs and token, e.g. when the account is removed."""
+    with _lock, _connection() as conn:
+        conn.execute("DELETE FROM outbox WHERE user_id = ?", (user_id,))
+        _tokens.pop(user_id, None)
+
+
+def _send(entry: tuple) -> requests.Response:
+    _, key, user_id, payload, _ = entry
+    headers = {
+        "Authorization": f"Bearer {_tokens.get(user_id)}",
+        "Content-Type": "application/json",
+        IDEMPOTENCY_HEADER: key,
+    }
+    # The payload is sent exactly as stored so every retry is byte-identical
+    return api_client.post(FOOD_LOG_URL, data=payload, headers=headers)
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(OUTBOX_BACKOFF_BASE * 2 ** attempts, OUTBOX_BACKOFF_MAX)
+    return time.time() + delay * random.uniform(0.5, 1.0)
+
+
+def _flush_due():
+    """Send every due entry whose user has a live token, then record each outcome."""
+    with _lock:
+        # A token known to be expired would only earn a 401; wait for the user's next visit instead
+        for user_id in [user_id for user_id, token in _tokens.items() if auth.token_expired(token)]:
+            del _tokens[user_id]
+        users = list(_tokens)
+        if not users:
+            return
+        entries = _connection().execute(
+            f"SELECT id, idempotency_key, user_id, payload, attempts FROM outbox "
+            f"WHERE status = ? AND next_attempt_at <= ? AND user_id IN ({', '.join('?' * len(users))}) "
+            f"ORDER BY id LIMIT ?",
+            (PENDING, time.time(), *users, OUTBOX_FLUSH_BATCH),
+        ).fetchall()
+
+    for future, entry in submit_each(_send, entries).items():
+        row_id, _, user_id, _, attempts = entry
+        try:
+            response = future.result()
+        except requests.exceptions.RequestException as e:
+            _retry_later(row_id, attempts, str(e))
+            continue
+
+        if response.status_code in (200, 201):
+            food_log_store.apply_created(user_id, response)
+            with _lock, _connection() as conn:
+                conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+        elif response.status_code == 401:
+            # Token expired: park the user's entries until they come back with a fresh one
+            with _lock:
+                _tokens.pop(user_id, None)
+        elif response.status_code in (408, 429, *HTTP_RETRY_STATUSES):
+            _retry_later(row_id, attempts, f"HTTP {response.status_code}")
+        else:
+            with _lock, _connection() as conn:
+                conn.execute("UPDATE outbox SET status = ?, last_error = ? WHERE id = ?",
+                             (REJECTED, f"HTTP {response.status_code}: {response.text[:200]}", row_id))
+
+    if len(entries) == OUTBOX_FLUSH_BATCH:
+        _wake.set()
+
+
+def _retry_later(row_id: int, attempts: int, error: str):
+    with _lock, _connection() as conn:
+        conn.execute("UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                     (attempts + 1, _backoff(attempts), error, row_id))
+
+
+def _run_worker():
+    while True:
+        _wake.wait(timeout=OUTBOX_POLL_INTERVAL)
+        _wake.clear()
+        try:
+            _flush_due()
+        except Exception:
+            logger.exception("Flushing the food log outbox failed")
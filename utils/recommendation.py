@@ -0,0 +1,44 @@
+import hashlib
+import json
+import os
+
+from utils import api_client
+from utils.cache import LRUCache, SQLiteStore
+from utils.constants import DIET_PREDICT_URL, DIET_MODEL_FIELDS, DIET_CACHE_SIZE, DIET_CACHE_PERSIST, CACHE_DIR
+
+_cache = LRUCache(maxsize=DIET_CACHE_SIZE)
+_disk = SQLiteStore(os.path.join(CACHE_DIR, "recommendations.sqlite"), "diet") if DIET_CACHE_PERSIST else None
+
+
+def profile_fingerprint(user_data: dict) -> str:
+    """
+    Stable hash of the profile fields the diet model uses
+    """
+    fields = {field: user_data.get(field) for field in DIET_MODEL_FIELDS}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_diet_recommendation(user_data: dict, headers: dict | None = None) -> str | None:
+    """
+    Return the recommendation for this profile, calling the model only when the
+    profile fingerprint has not been seen before. Returns None if the backend fails.
+    """
+    key = profile_fingerprint(user_data)
+
+    recommendation = _cache.get(key)
+    if recommendation is None and _disk is not None:
+        recommendation = _disk.get(key)
+        if recommendation is not None:
+            _cache.set(key, recommendation)
+    if recommendation is not None:
+        return recommendation
+
+    response = api_client.post(DIET_PREDICT_URL, json=user_data, headers=headers)
+    if response.status_code != 200:
+        return None
+
+    recommendation = response.json().get("recommendation", "no recommendation available.")
+    _cache.set(key, recommendation)
+    if _disk is not None:
+        _disk.set(key, recommendation)
+    return recommendation
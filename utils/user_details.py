@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from utils import api_client
+from utils.cache import LRUCache
+from utils.constants import USER_DETAILS_URL, USER_DETAILS_CACHE_SIZE, USER_DETAILS_CACHE_TTL, BMI
+from utils.helper import calculate_bmi
+from utils.lazy import lazy_import
+
+requests = lazy_import("requests")
+
+# user_id -> user details dict, shared by the dashboard and the profile page
+_cache = LRUCache(maxsize=USER_DETAILS_CACHE_SIZE, ttl=USER_DETAILS_CACHE_TTL)
+
+
+def get_user_details(user_id: str, headers: dict | None = None) -> tuple[int, dict]:
+    """
+    Return (status_code, details) for the user, hitting the backend only on a cache miss.
+    Only successful lookups are cached.
+    """
+    cached = _cache.get(user_id)
+    if cached is not None:
+        return 200, dict(cached)
+
+    response = api_client.get(USER_DETAILS_URL, headers=headers)
+    if response.status_code != 200:
+        return response.status_code, {}
+
+    details = response.json()
+    _cache.set(user_id, details)
+    return 200, dict(details)
+
+
+def update_user_details(user_id: str, payload: dict, response: requests.Response):
+    """
+    Write-through after a successful PATCH/POST: merge the sent payload (and the
+    backend's echo, if any) into the cached entry so the next read needs no round trip.
+    """
+    try:
+        echoed = response.json()
+    except ValueError:
+        echoed = None
+    if not isinstance(echoed, dict):
+        echoed = {}
+
+    details = {**_cache.get(user_id, {}), **payload, **echoed}
+    if BMI not in echoed:
+        # Height or weight may have changed and the backend didn't send the new BMI back
+        details[BMI] = calculate_bmi(details["height_cm"], details["weight_kg"])
+    _cache.set(user_id, details)
+
+
+def invalidate_user_details(user_id: str):
+    _cache.pop(user_id)